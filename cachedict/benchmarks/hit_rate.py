@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__doc__ = "compare hit rates of cachedict policies under Zipf and scan-mixed traces"
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from collections.abc import Callable, Iterator
+from itertools import accumulate, count
+from random import Random
+
+from cachedict import ARCDict, BucketLFUDict, FastLRUDict, LFUDict, LRUDict
+
+
+POLICIES: dict[str, Callable] = {
+    "LRUDict": LRUDict, 
+    "LFUDict": LFUDict, 
+    "BucketLFUDict": BucketLFUDict, 
+    "FastLRUDict": FastLRUDict, 
+    "ARCDict": ARCDict, 
+}
+
+
+def zipf_trace(
+    n: int, 
+    /, 
+    universe: int = 10_000, 
+    alpha: float = 0.9, 
+    seed: int = 0, 
+) -> list[int]:
+    "`n` keys drawn from `range(universe)` with Zipf(alpha) popularity"
+    cum_weights = list(accumulate(1 / (i ** alpha) for i in range(1, universe + 1)))
+    return Random(seed).choices(range(universe), cum_weights=cum_weights, k=n)
+
+
+def scan_mixed_trace(
+    n: int, 
+    /, 
+    universe: int = 10_000, 
+    alpha: float = 0.9, 
+    scan_every: int = 20_000, 
+    scan_length: int = 5_000, 
+    seed: int = 0, 
+) -> list[int]:
+    "a Zipf trace, interrupted by one-time sequential scans over never-seen keys"
+    trace = zipf_trace(n, universe=universe, alpha=alpha, seed=seed)
+    fresh: Iterator[int] = count(universe)
+    mixed: list[int] = []
+    for i in range(0, n, scan_every):
+        mixed.extend(trace[i:i+scan_every])
+        mixed.extend(next(fresh) for _ in range(scan_length))
+    return mixed
+
+
+def hit_rate(cache, trace: list, /) -> float:
+    hits = 0
+    for key in trace:
+        try:
+            cache[key]
+            hits += 1
+        except KeyError:
+            cache[key] = key
+    return hits / len(trace)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__, formatter_class=RawTextHelpFormatter)
+    parser.add_argument("-n", "--length", type=int, default=200_000, help="number of requests per trace")
+    parser.add_argument("-u", "--universe", type=int, default=10_000, help="number of distinct hot keys")
+    parser.add_argument("-a", "--alpha", type=float, default=0.9, help="Zipf exponent")
+    parser.add_argument("-m", "--maxsize", type=int, nargs="*", default=[100, 1000], help="cache sizes")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+    traces = {
+        "zipf": zipf_trace(args.length, universe=args.universe, alpha=args.alpha, seed=args.seed), 
+        "zipf+scan": scan_mixed_trace(args.length, universe=args.universe, alpha=args.alpha, seed=args.seed), 
+    }
+    print(f"{'trace':<10} {'maxsize':>8} " + " ".join(f"{name:>14}" for name in POLICIES))
+    for trace_name, trace in traces.items():
+        for maxsize in args.maxsize:
+            rates = (hit_rate(policy(maxsize), trace) for policy in POLICIES.values())
+            print(f"{trace_name:<10} {maxsize:>8} " + " ".join(f"{rate:>14.2%}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# encoding: utf-8
+
+__author__ = "ChenyangGao <https://chenyanggao.github.io>"
+__doc__ = """\
+benchmark every cachedict class over uniform, Zipf, scan and TTL-heavy traces,
+and report ops/sec, hit rate and peak memory (by tracemalloc)
+
+    python policies.py -o baseline.json
+    # after some changes
+    python policies.py -c baseline.json
+
+With -c, the exit status is 1 if ops/sec of any (trace, policy) dropped by more
+than the threshold. Hit rates of the "ttl" trace depend on the speed of the
+machine, since items expire by the wall clock."""
+
+from argparse import ArgumentParser, RawTextHelpFormatter
+from collections.abc import Callable
+from gc import collect, disable as gc_disable, enable as gc_enable
+from json import dump, load
+from math import inf
+from os.path import dirname
+from platform import python_implementation, python_version
+from random import Random
+from sys import path as sys_path
+from time import perf_counter
+from tracemalloc import get_traced_memory, start as trace_start, stop as trace_stop
+
+from cachedict import (
+    ARCDict, BucketLFUDict, ExpireDict, FastFIFODict, FastLRUDict, FIFODict, 
+    LFUDict, LIFODict, LRUDict, MRUDict, PriorityDict, RRDict, ShardedDict, 
+    SharedDict, TTLDict, 
+)
+
+# also importable, when this script is run as a module or imported from elsewhere
+sys_path.insert(0, dirname(__file__))
+from hit_rate import hit_rate, scan_mixed_trace, zipf_trace
+
+
+def uniform_trace(n: int, /, universe: int = 10_000, seed: int = 0) -> list[int]:
+    "`n` keys drawn uniformly from `range(universe)`"
+    rand = Random(seed)
+    return [rand.randrange(universe) for _ in range(n)]
+
+
+def shared_dict(maxsize: int, ttl: float, /) -> SharedDict:
+    return SharedDict(maxsize=maxsize, slot_size=128, ttl=ttl)
+
+
+#: name -> (factory(maxsize, ttl), whether the policy expires items by time)
+POLICIES: dict[str, tuple[Callable, bool]] = {
+    "LIFODict": (lambda n, ttl: LIFODict(n), False), 
+    "FIFODict": (lambda n, ttl: FIFODict(n), False), 
+    "RRDict": (lambda n, ttl: RRDict(n), False), 
+    "LRUDict": (lambda n, ttl: LRUDict(n), False), 
+    "MRUDict": (lambda n, ttl: MRUDict(n), False), 
+    "LFUDict": (lambda n, ttl: LFUDict(n), False), 
+    "BucketLFUDict": (lambda n, ttl: BucketLFUDict(n), False), 
+    "ARCDict": (lambda n, ttl: ARCDict(n), False), 
+    "FastFIFODict": (lambda n, ttl: FastFIFODict(n), False), 
+    "FastLRUDict": (lambda n, ttl: FastLRUDict(n), False), 
+    "ShardedDict": (lambda n, ttl: ShardedDict(maxsize=n), False), 
+    "TTLDict": (lambda n, ttl: TTLDict(ttl, maxsize=n), True), 
+    "TTLDict(lru)": (lambda n, ttl: TTLDict(ttl, is_lru=True, maxsize=n), True), 
+    "PriorityDict": (lambda n, ttl: PriorityDict(lambda k, v: k, maxsize=n), False), 
+    "ExpireDict": (lambda n, ttl: ExpireDict(ttl, maxsize=n), True), 
+    "SharedDict": (shared_dict, True), 
+}
+
+
+def run_once(make: Callable, trace: list, /, measure_memory: bool = False) -> tuple[float, float, int]:
+    """run the trace through a new cache
+
+    :return: 3-tuple, (ops/sec, hit rate, peak memory in bytes (0 if not `measure_memory`))
+    """
+    cache = make()
+    try:
+        collect()
+        if measure_memory:
+            trace_start()
+        else:
+            gc_disable()
+        try:
+            start = perf_counter()
+            rate = hit_rate(cache, trace)
+            elapsed = perf_counter() - start
+            peak = get_traced_memory()[1] if measure_memory else 0
+        finally:
+            if measure_memory:
+                trace_stop()
+            else:
+                gc_enable()
+    finally:
+        if isinstance(cache, SharedDict):
+            cache.close()
+            cache.unlink()
+    return len(trace) / elapsed, rate, peak
+
+
+def bench(
+    policy: str, 
+    trace: list, 
+    /, 
+    maxsize: int, 
+    ttl: float = inf, 
+    repeat: int = 3, 
+) -> dict:
+    "the best ops/sec out of `repeat` runs, plus the hit rate and the peak memory of an extra traced run"
+    factory = POLICIES[policy][0]
+    make = lambda: factory(maxsize, ttl)
+    ops = max(run_once(make, trace)[0] for _ in range(repeat))
+    _, rate, peak = run_once(make, trace, measure_memory=True)
+    return {"ops_per_sec": ops, "hit_rate": rate, "peak_memory": peak}
+
+
+def compare(results: dict, baseline: dict, /, threshold: float = 0.1) -> list[str]:
+    "list the (trace, policy) pairs, whose ops/sec dropped by more than `threshold`"
+    regressions: list[str] = []
+    for key, result in results.items():
+        if old := baseline.get(key):
+            change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+            if change < -threshold:
+                regressions.append(f"{key}: {old['ops_per_sec']:,.0f} -> {result['ops_per_sec']:,.0f} ops/sec ({change:+.1%})")
+    return regressions
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__, formatter_class=RawTextHelpFormatter)
+    parser.add_argument("-n", "--length", type=int, default=100_000, help="number of requests per trace")
+    parser.add_argument("-u", "--universe", type=int, default=10_000, help="number of distinct keys")
+    parser.add_argument("-m", "--maxsize", type=int, default=1000, help="cache size")
+    parser.add_argument("-t", "--ttl", type=float, default=0.01, help="seconds to live, for the \"ttl\" trace")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per (trace, policy), the best one counts")
+    parser.add_argument("-p", "--policy", nargs="*", choices=POLICIES, help="policies to run, if omitted, run all")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("-c", "--compare", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative drop of ops/sec, which counts as a regression")
+    args = parser.parse_args()
+    n, universe, seed = args.length, args.universe, args.seed
+    zipf = zipf_trace(n, universe=universe, seed=seed)
+    traces = {
+        "uniform": (uniform_trace(n, universe=universe, seed=seed), inf), 
+        "zipf": (zipf, inf), 
+        "scan": (scan_mixed_trace(n, universe=universe, seed=seed), inf), 
+        "ttl": (zipf, args.ttl), 
+    }
+    policies = args.policy or list(POLICIES)
+    results: dict[str, dict] = {}
+    print(f"# {python_implementation()} {python_version()}, length={n}, universe={universe}, maxsize={args.maxsize}")
+    print(f"{'trace':<8} {'policy':<14} {'ops/sec':>12} {'hit rate':>9} {'peak memory':>12}")
+    for trace_name, (trace, ttl) in traces.items():
+        for policy in policies:
+            if ttl < inf and not POLICIES[policy][1]:
+                continue
+            result = results[f"{trace_name}/{policy}"] = bench(policy, trace, maxsize=args.maxsize, ttl=ttl, repeat=args.repeat)
+            print(f"{trace_name:<8} {policy:<14} {result['ops_per_sec']:>12,.0f} {result['hit_rate']:>9.2%} {result['peak_memory'] / 1024:>10,.0f}KB")
+    if args.output:
+        with open(args.output, "w") as f:
+            dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, load(f), threshold=args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", *regressions, sep="\n  ")
+            return 1
+        print("\nno regression")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
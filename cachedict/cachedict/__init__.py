@@ -7,28 +7,218 @@ __author__ = "ChenyangGao <https://chenyanggao.github.io>"
 __version__ = (0, 0, 7)
 __all__ = [
     "SizedDict", "LIFODict", "FIFODict", "RRDict", "LRUDict", "MRUDict", 
-    "TTLDict", "LFUDict", "PriorityDict", "ExpireDict", "TLRUDict", 
-    "FastFIFODict", "FastLRUDict", 
+    "TTLDict", "LFUDict", "BucketLFUDict", "ARCDict", "PriorityDict", "ExpireDict", "TLRUDict", 
+    "FastFIFODict", "FastLRUDict", "ShardedDict", "SharedDict", "start_sweeper", 
+    "async_sweeper", "default_weigher", "CacheStats", "with_stats", 
+    "make_key_builder", 
 ]
 
+from asyncio import ensure_future, shield, sleep as async_sleep, Future
 from collections import deque, defaultdict, UserDict
-from collections.abc import Callable, Hashable, Iterable, Iterator
+from collections.abc import Buffer, Callable, Coroutine, Hashable, Iterable, Iterator, Mapping, MutableMapping
+from concurrent.futures import Executor, Future as ConcurrentFuture, ThreadPoolExecutor
+from contextlib import suppress, AbstractContextManager
 from copy import copy
 from dataclasses import dataclass, field
-from functools import update_wrapper
+from functools import cache, partial, update_wrapper
+from hashlib import blake2b
 from heapq import heappush, heappop, nlargest, nsmallest
-from inspect import signature, _empty
-from itertools import count
+from inspect import iscoroutinefunction, signature, _empty
+from itertools import count, islice
 from math import inf, isinf, isnan
+from multiprocessing import Lock as MPLock
+from multiprocessing.shared_memory import SharedMemory
 from operator import itemgetter
-from random import choice
-from time import time
+from os import getpid, open as os_open, remove, O_CREAT, O_RDWR
+from os.path import join as joinpath
+from pickle import dumps as pickle_dumps, loads as pickle_loads
+from random import choice, randrange
+from secrets import token_hex
+from struct import Struct
+from sys import getsizeof, platform, version_info
+from tempfile import gettempdir
+from threading import Event, Lock, Thread
+from time import monotonic, perf_counter, time
 from types import MappingProxyType
-from typing import cast, overload, Any, Literal, Self
+from typing import cast, overload, Any, Final, Literal, Self
 from warnings import warn
 
 from undefined import undefined, Undefined
 
+try:
+    from fcntl import flock, LOCK_EX, LOCK_UN
+except ImportError:
+    flock = None # type: ignore
+
+
+SWEEP_BATCH_SIZE: Final = 64
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    insertions: int = 0
+    evictions: defaultdict[str, int] = field(default_factory=lambda: defaultdict(int))
+    miss_time: float = 0.0
+
+    def __add__(self, other: CacheStats, /) -> CacheStats:
+        evictions = defaultdict(int, self.evictions)
+        for reason, n in other.evictions.items():
+            evictions[reason] += n
+        return CacheStats(
+            hits=self.hits + other.hits, 
+            misses=self.misses + other.misses, 
+            insertions=self.insertions + other.insertions, 
+            evictions=evictions, 
+            miss_time=self.miss_time + other.miss_time, 
+        )
+
+    def reset(self, /):
+        self.hits = self.misses = self.insertions = 0
+        self.evictions.clear()
+        self.miss_time = 0.0
+
+
+def default_weigher(key, value, /) -> int:
+    "the default weigher: number of bytes for a buffer, or else `sys.getsizeof(value)`"
+    if isinstance(value, Buffer):
+        return memoryview(value).nbytes
+    return getsizeof(value)
+
+
+def make_key_builder(
+    func: Callable, 
+    /, 
+    typed: bool = False, 
+    ignore: Iterable[str] = (), 
+) -> Callable:
+    """make a function, which builds a hashable key from the arguments of `func`
+
+    The key of a call only contains the arguments which were passed (like the 
+    `arguments` of `inspect.Signature.bind`), but the builder is generated by 
+    source code at decoration time, so no `inspect` machinery runs per call.
+
+    :param func: the function to call
+    :param typed: if True, the types of the arguments are also part of the key
+    :param ignore: names of parameters which do not take part in the key
+
+    :return: the key builder, which accepts the same arguments as `func`
+    """
+    ignore = frozenset(ignore)
+    try:
+        sig = signature(func)
+    except ValueError:
+        if ignore:
+            raise
+        if typed:
+            def key(*args, **kwds):
+                return args, tuple(kwds.items()), tuple(map(type, args)), tuple(map(type, kwds.values()))
+        else:
+            def key(*args, **kwds):
+                return args, tuple(kwds.items())
+        return key
+    if unknown := ignore.difference(sig.parameters):
+        raise ValueError(f"{func!r} has no such parameters: {", ".join(sorted(unknown))}")
+    params = tuple(sig.parameters.values())
+    if not params:
+        def key(): # type: ignore
+            return None
+        return key
+    if not (typed or ignore):
+        param = params[0]
+        if len(params) == 1 and param.kind is param.POSITIONAL_ONLY and param.default is _empty:
+            def key(arg, /): # type: ignore
+                return arg
+            return key
+        elif all(p.kind in (param.POSITIONAL_ONLY, param.VAR_POSITIONAL) for p in params):
+            def key(*args): # type: ignore
+                return args
+            return key
+        elif all(p.kind in (param.KEYWORD_ONLY, param.VAR_KEYWORD) for p in params):
+            def key(**kwds): # type: ignore
+                return tuple(kwds.items())
+            return key
+    # the names in the generated code must not collide with the parameters
+    def free_name(name: str, /) -> str:
+        while name in sig.parameters:
+            name += "_"
+        return name
+    # a parameter is not passed, iff it still refers to the sentinel
+    sentinel = free_name("_undefined")
+    r, tuple_, type_, map_ = map(free_name, ("_r", "_tuple", "_type", "_map"))
+    arglist: list[str] = []
+    lines: list[str] = []
+    conditional = False
+    var_keyword = ""
+    for param in params:
+        name = param.name
+        match param.kind:
+            case param.POSITIONAL_ONLY | param.POSITIONAL_OR_KEYWORD | param.KEYWORD_ONLY:
+                if param.kind is param.KEYWORD_ONLY and not any(a.startswith("*") for a in arglist):
+                    arglist.append("*")
+                if param.default is _empty:
+                    arglist.append(name)
+                else:
+                    arglist.append(f"{name}={sentinel}")
+                if param.kind is param.POSITIONAL_ONLY and (
+                    len(arglist) == len(params) or params[len(arglist)].kind is not param.POSITIONAL_ONLY
+                ):
+                    arglist.append("/")
+                if name in ignore:
+                    continue
+                item = f"({name!r}, {name}, {type_}({name}))" if typed else f"({name!r}, {name})"
+                if param.default is _empty:
+                    lines.append(f"{r}.append({item})")
+                else:
+                    conditional = True
+                    lines.append(f"if {name} is not {sentinel}: {r}.append({item})")
+            case param.VAR_POSITIONAL:
+                arglist.append("*" + name)
+                if name in ignore:
+                    continue
+                conditional = True
+                item = f"({name!r}, {name}, {tuple_}({map_}({type_}, {name})))" if typed else f"({name!r}, {name})"
+                lines.append(f"if {name}: {r}.append({item})")
+            case param.VAR_KEYWORD:
+                arglist.append("**" + name)
+                if name not in ignore:
+                    var_keyword = name
+    if var_keyword:
+        if typed:
+            kwds_key = f"{tuple_}((k, v, {type_}(v)) for k, v in {var_keyword}.items())"
+        else:
+            kwds_key = f"{tuple_}({var_keyword}.items())"
+    if conditional:
+        body = [f"{r} = []", *lines, f"return {tuple_}({r}), {kwds_key}" if var_keyword else f"return {tuple_}({r})"]
+    else:
+        items = "".join(line.removeprefix(f"{r}.append(").removesuffix(")") + ", " for line in lines)
+        body = [f"return ({items}), {kwds_key}" if var_keyword else f"return ({items})"]
+    code = f"def key({", ".join(arglist)}):\n" + "".join(f"    {line}\n" for line in body)
+    ns: dict = {sentinel: undefined, tuple_: tuple, type_: type, map_: map}
+    exec(code, ns)
+    key = ns["key"]
+    key.__qualname__ = f"make_key_builder.<locals>.key[{getattr(func, "__qualname__", func)}]"
+    return key
+
+
+@cache
+def _default_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(thread_name_prefix="cachedict-refresh")
+
+
+def _warn_key_error(key: Callable, args: tuple, kwds: dict, e: Exception, /):
+    args_str = ", ".join((
+        ", ".join(map(repr, args)), 
+        ", ".join(f"{k}={v!r}" for k, v in kwds.items()), 
+    ))
+    exctype = type(e)
+    if exctype.__module__ in ("builtins", "__main__"):
+        exc_name = exctype.__qualname__
+    else:
+        exc_name = f"{exctype.__module__}.{exctype.__qualname__}"
+    warn(f"{key!r}({args_str}) encountered an error {exc_name}: {e}")
+
 
 class CleanedKeyError(KeyError):
 
@@ -40,7 +230,7 @@ class CleanedKeyError(KeyError):
 
 class SizedDict[K: Hashable, V](defaultdict[K, V]):
     "dictionary with maxsize"
-    __slots__ = ("maxsize", "auto_clean", "default_factory")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def __init__(
         self, 
@@ -48,10 +238,17 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
         super().__init__(default_factory)
         self.maxsize = maxsize
         self.auto_clean = auto_clean
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self._weights: dict[K, int] = {}
+        self._total_weight = 0
+        self._stats: None | CacheStats = None
 
     @overload
     def __call__[**P](
@@ -59,14 +256,34 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         func: None = None, 
         /, 
         key: None | Callable[P, K] = None, 
+        typed: bool = False, 
+        ignore: Iterable[str] = (), 
+        refresh_ahead: float = 0, 
+        executor: None | Executor = None, 
     ) -> Callable[[Callable[P, V]], Callable[P, V]]:
         ...
     @overload
+    def __call__[**P](
+        self, 
+        func: Callable[P, Coroutine[Any, Any, V]], 
+        /, 
+        key: None | Callable[P, K] = None, 
+        typed: bool = False, 
+        ignore: Iterable[str] = (), 
+        refresh_ahead: float = 0, 
+        executor: None | Executor = None, 
+    ) -> Callable[P, Coroutine[Any, Any, V]]:
+        ...
+    @overload
     def __call__[**P](
         self, 
         func: Callable[P, V], 
         /, 
         key: None | Callable[P, K] = None, 
+        typed: bool = False, 
+        ignore: Iterable[str] = (), 
+        refresh_ahead: float = 0, 
+        executor: None | Executor = None, 
     ) -> Callable[P, V]:
         ...
     def __call__[**P](
@@ -74,71 +291,138 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         func: None | Callable[P, V] = None, 
         /, 
         key: None | Callable[P, K] = None, 
+        typed: bool = False, 
+        ignore: Iterable[str] = (), 
+        refresh_ahead: float = 0, 
+        executor: None | Executor = None, 
     ) -> Callable[P, V] | Callable[[Callable[P, V]], Callable[P, V]]:
+        """decorate a function to memoize its results in this dictionary
+
+        :param func: the function to be decorated
+        :param key: computes the key from the arguments, if None, use `make_key_builder(func, typed=typed, ignore=ignore)`
+        :param typed: if True, arguments of different types will be cached separately (only works when `key` is None)
+        :param ignore: names of parameters which do not take part in the key (only works when `key` is None)
+        :param refresh_ahead: (only for TTLDict) a fraction of the ttl, if > 0, once an item is older than it, 
+            the cached value is returned and the function is called again in the background. 
+            Besides, if the TTLDict has a `stale_ttl`, expired values are also returned in this way within that grace period
+        :param executor: runs the background refreshes of a sync function, if None, use a shared thread pool
+
+        :return: the decorated function, or a decorator if `func` is None
+        """
         if func is None:
             def decorator(func: Callable[P, V], /):
-                return self(func, key=key)
+                return self(func, key=key, typed=typed, ignore=ignore, refresh_ahead=refresh_ahead, executor=executor)
             return decorator
         if key is None:
+            key = make_key_builder(func, typed=typed, ignore=ignore)
+        stats: None | CacheStats = getattr(self, "_stats", None)
+        refresh = refresh_ahead > 0 or getattr(self, "stale_ttl", 0) > 0
+        if refresh and not (hasattr(self, "peek") and hasattr(self, "ttl")):
+            raise TypeError(f"refresh-ahead and stale-while-revalidate require a TTLDict, got {self!r}")
+        def needs_refresh(age: float, /) -> bool:
+            ttl = self.ttl
+            return age >= ttl or 0 < refresh_ahead and age >= ttl * refresh_ahead
+        if iscoroutinefunction(func):
+            pending_tasks: dict[K, Future] = {}
+            def start(k: K, args: tuple, kwds: dict, /) -> Future:
+                try:
+                    return pending_tasks[k]
+                except KeyError:
+                    pass
+                start_t = perf_counter()
+                task = pending_tasks[k] = ensure_future(func(*args, **kwds)) # type: ignore
+                def done(task, /):
+                    # the waiters already got the result of `task`, storing it may still fail
+                    try:
+                        if not task.cancelled() and task.exception() is None:
+                            with suppress(ValueError):
+                                self[k] = task.result()
+                    finally:
+                        if stats is not None:
+                            stats.miss_time += perf_counter() - start_t
+                        if pending_tasks.get(k) is task:
+                            del pending_tasks[k]
+                task.add_done_callback(done)
+                return task
+            async def async_wrapper(*args: P.args, **kwds: P.kwargs) -> V:
+                try:
+                    k = key(*args, **kwds)
+                except Exception as e:
+                    _warn_key_error(key, args, kwds, e)
+                    return await func(*args, **kwds) # type: ignore
+                try:
+                    if refresh:
+                        value, age = self.peek(k) # type: ignore
+                        if needs_refresh(age):
+                            start(k, args, kwds)
+                        return value
+                    return self[k]
+                except KeyError:
+                    pass
+                except TypeError:
+                    return await func(*args, **kwds) # type: ignore
+                return await shield(start(k, args, kwds))
+            return update_wrapper(async_wrapper, func) # type: ignore
+        pending_futures: dict[K, ConcurrentFuture] = {}
+        pending_lock = Lock()
+        def compute(k: K, args: tuple, kwds: dict, future: ConcurrentFuture, /) -> V:
+            start_t = perf_counter()
             try:
-                sig = signature(func)
-                params = tuple(sig.parameters.values())
-            except ValueError:
-                pass
+                v = func(*args, **kwds)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
             else:
-                if not params:
-                    def key(): # type: ignore
-                        return None
-                else:
-                    param = params[0]
-                    if len(params) == 1 and param.kind is param.POSITIONAL_ONLY and param.default is _empty:
-                        def key(arg, /): # type: ignore
-                            return arg
-                    elif all(p.kind in (param.POSITIONAL_ONLY, param.VAR_POSITIONAL) for p in params):
-                        def key(*args): # type: ignore
-                            return args
-                    elif all(p.kind in (param.KEYWORD_ONLY, param.VAR_KEYWORD) for p in params):
-                        def key(**kwds): # type: ignore
-                            return tuple(kwds.items())
-                    elif params[-1].kind is param.VAR_KEYWORD:
-                        kwds_name = params[-1].name
-                        def key(*args: P.args, **kwds: P.kwargs):
-                            bound_args = sig.bind(*args, **kwds)
-                            arguments = bound_args.arguments
-                            try:
-                                kwargs = arguments.pop(kwds_name)
-                            except KeyError:
-                                return tuple(arguments.items()), ()
-                            return tuple(arguments.items()), tuple(kwargs.items())
-                    else:
-                        def key(*args: P.args, **kwds: P.kwargs):
-                            bound_args = sig.bind(*args, **kwds)
-                            return tuple(bound_args.arguments.items())
-            if key is None:
-                def key(*args: P.args, **kwds: P.kwargs):
-                    return args, tuple(kwds.items())
+                # resolve the waiters first, storing may still fail
+                future.set_result(v)
+                with suppress(ValueError):
+                    self[k] = v
+                return v
+            finally:
+                if stats is not None:
+                    stats.miss_time += perf_counter() - start_t
+                with pending_lock:
+                    if pending_futures.get(k) is future:
+                        del pending_futures[k]
         def wrapper(*args: P.args, **kwds: P.kwargs) -> V:
             try:
                 k = key(*args, **kwds)
             except Exception as e:
-                args_str = ", ".join((
-                    ", ".join(map(repr, args)), 
-                    ", ".join(f"{k}={v!r}" for k, v in kwds.items()), 
-                ))
-                exctype = type(e)
-                if exctype.__module__ in ("builtins", "__main__"):
-                    exc_name = exctype.__qualname__
-                else:
-                    exc_name = f"{exctype.__module__}.{exctype.__qualname__}"
-                warn(f"{key!r}({args_str}) encountered an error {exc_name}: {e}")
+                _warn_key_error(key, args, kwds, e)
                 return func(*args, **kwds)
             try:
+                if refresh:
+                    value, age = self.peek(k) # type: ignore
+                    if needs_refresh(age):
+                        with pending_lock:
+                            if k in pending_futures:
+                                return value
+                            future = pending_futures[k] = ConcurrentFuture()
+                        (executor or _default_executor()).submit(compute, k, args, kwds, future)
+                    return value
                 return self[k]
             except KeyError:
-                v = self[k] = func(*args, **kwds)
-                return v
+                pass
             except TypeError:
                 return func(*args, **kwds)
+            with pending_lock:
+                try:
+                    future = pending_futures[k]
+                except KeyError:
+                    # another thread may have finished computing just now
+                    if k in self:
+                        try:
+                            return self[k]
+                        except KeyError:
+                            pass
+                    future = pending_futures[k] = ConcurrentFuture()
+                    owner = True
+                else:
+                    owner = False
+            # wait outside the lock, or the computation could not clean up, nor other keys proceed
+            if not owner:
+                return future.result()
+            return compute(k, args, kwds, future)
         return update_wrapper(wrapper, func)
 
     def __repr__(self, /) -> str:
@@ -158,10 +442,41 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         except (KeyError, TypeError):
             return False
 
+    def __delitem__(self, key: K, /):
+        super().__delitem__(key)
+        if self._weights:
+            self._total_weight -= self._weights.pop(key, 0)
+
     def __setitem__(self, key: K, value: V, /):
         if self.auto_clean and not super().__contains__(key):
             self.clean(1)
-        super().__setitem__(key, value)
+        if (maxweight := self.maxweight) > 0:
+            weights = self._weights
+            weight = (self.weigher or default_weigher)(key, value)
+            if weight > maxweight:
+                self.discard(key)
+                raise ValueError(f"weight of {key!r} is {weight}, exceeding maxweight={maxweight!r}")
+            if self.auto_clean:
+                popitem = self.popitem
+                n = 0
+                try:
+                    while self._total_weight - weights.get(key, 0) + weight > maxweight:
+                        popitem()
+                        n += 1
+                except KeyError:
+                    pass
+                if n and (stats := self._stats) is not None:
+                    stats.evictions["weight"] += n
+            super().__setitem__(key, value)
+            self._total_weight += weight - weights.get(key, 0)
+            weights[key] = weight
+        else:
+            super().__setitem__(key, value)
+
+    @property
+    def weight(self, /) -> int:
+        "total weight of all items (always 0 if `maxweight` <= 0)"
+        return self._total_weight
 
     @overload
     @classmethod
@@ -199,9 +514,12 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
     def clean(self, /, extra: int = 0) -> list[tuple[K, V]]:
         items: list[tuple[K, V]] = []
         add_item = items.append
+        stats = self._stats
         if self and (maxsize := self.maxsize) > 0:
             remains = maxsize - extra
             if remains <= 0:
+                if stats is not None:
+                    stats.evictions["size"] += super().__len__()
                 self.clear()
             else:
                 popitem = self.popitem
@@ -210,6 +528,18 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
                         add_item(popitem())
                 except KeyError:
                     pass
+                if stats is not None and items:
+                    stats.evictions["size"] += len(items)
+        if (maxweight := self.maxweight) > 0 and self._total_weight > maxweight:
+            n = len(items)
+            popitem = self.popitem
+            try:
+                while self._total_weight > maxweight:
+                    add_item(popitem())
+            except KeyError:
+                pass
+            if stats is not None:
+                stats.evictions["weight"] += len(items) - n
         return items
 
     def copy(self, /) -> Self:
@@ -229,6 +559,24 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         except StopIteration:
             pass
 
+    def delete_many(self, keys: Iterable[K], /) -> dict[K, V]:
+        """remove many keys at once, missing keys are ignored
+
+        :return: the removed items
+        """
+        removed: dict[K, V] = {}
+        contains = dict.__contains__
+        getitem = dict.__getitem__
+        for k in keys:
+            try:
+                if not contains(self, k):
+                    continue
+            except TypeError:
+                continue
+            removed[k] = getitem(self, k)
+            del self[k]
+        return removed
+
     @overload
     def get(self, key: K, /, default: None = None) -> None | V:
         ...
@@ -241,6 +589,25 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
         except KeyError:
             return default
 
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
+        """look up many keys at once, `default_factory` is not called for missing keys
+
+        :return: 2-tuple, the found items and the missing keys
+        """
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        add_missing = missing.append
+        contains = dict.__contains__
+        for k in keys:
+            try:
+                if contains(self, k):
+                    found[k] = self[k]
+                    continue
+            except (KeyError, TypeError):
+                pass
+            add_missing(k)
+        return found, missing
+
     def iter(self, /) -> Iterator[K]:
         if self.auto_clean:
             self.clean()
@@ -296,6 +663,35 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
             self[key] = default
             return default
 
+    def set_many(self, items: Mapping[K, V] | Iterable[tuple[K, V]], /):
+        """set many items at once, making room for all of them in a single eviction pass
+
+        If there are more items than `maxsize`, only the last `maxsize` ones are kept.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        pairs = dict(items)
+        if not pairs:
+            return
+        if not self.auto_clean:
+            self._store_many(pairs)
+            return
+        if (maxsize := self.maxsize) > 0 and len(pairs) > maxsize:
+            pairs = dict(islice(pairs.items(), len(pairs) - maxsize, None))
+        contains = dict.__contains__
+        self.clean(sum(not contains(self, k) for k in pairs))
+        self.auto_clean = False
+        try:
+            self._store_many(pairs)
+        finally:
+            self.auto_clean = True
+            if self.maxweight > 0:
+                self.clean()
+
+    def _store_many(self, pairs: dict[K, V], /):
+        for k, v in pairs.items():
+            self[k] = v
+
     def update(self, /, *args, **pairs):
         cache: dict = {}
         try:
@@ -323,7 +719,7 @@ class SizedDict[K: Hashable, V](defaultdict[K, V]):
 
 class LIFODict[K: Hashable, V](SizedDict[K, V]):
     "Last In First Out (FIFO)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def __setitem__(self, key: K, value: V, /):
         self.discard(key)
@@ -332,7 +728,7 @@ class LIFODict[K: Hashable, V](SizedDict[K, V]):
 
 class FIFODict[K: Hashable, V](LIFODict[K, V]):
     "First In First Out (FIFO)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def popitem(self, /) -> tuple[K, V]:
         try:
@@ -351,7 +747,7 @@ class FIFODict[K: Hashable, V](LIFODict[K, V]):
 
 class RRDict[K: Hashable, V](SizedDict[K, V]):
     "Random Replacement (RR)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "_keys", "_key_to_idx")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "_keys", "_key_to_idx")
 
     def __init__(
         self, 
@@ -359,8 +755,10 @@ class RRDict[K: Hashable, V](SizedDict[K, V]):
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
-        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory)
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
         self._keys: list[K] = []
         self._key_to_idx: dict[K, int] = {}
 
@@ -408,12 +806,12 @@ class RRDict[K: Hashable, V](SizedDict[K, V]):
 
 class LRUDict[K: Hashable, V](FIFODict[K, V]):
     "Least Recently Used (LRU)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def __getitem__(self, key: K, /) -> V:
         value = super().__getitem__(key)
-        self.discard(key)
-        self[key] = value
+        # move to the end, the weight is unchanged, so do not weigh again
+        dict.__setitem__(self, key, dict.pop(self, key))
         return value
 
 
@@ -431,7 +829,7 @@ class KeyAlive[K]:
 
 class MRUDict[K: Hashable, V](SizedDict[K, V]):
     "Most Recently Used (MRU)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "_key_cache", "_key_deque")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "_key_cache", "_key_deque")
 
     def __init__(
         self, 
@@ -439,8 +837,10 @@ class MRUDict[K: Hashable, V](SizedDict[K, V]):
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
-        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory)
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
         self._key_cache: dict[K, KeyAlive[K]] = {}
         self._key_deque: deque[KeyAlive[K]] = deque()
 
@@ -489,8 +889,13 @@ class MRUDict[K: Hashable, V](SizedDict[K, V]):
 
 
 class TTLDict[K, V](SizedDict[K, V]):
-    "Time-To-Live (TTL)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "ttl", "is_lru", "_start_time_table")
+    """Time-To-Live (TTL)
+
+    An item older than `ttl` is stale and looks missing, but it is only reclaimed 
+    after `ttl + stale_ttl`, so that a memoizer can still serve it (with `peek`) 
+    while recomputing in the background.
+    """
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "ttl", "is_lru", "stale_ttl", "_start_time_table")
 
     def __init__(
         self, 
@@ -500,10 +905,14 @@ class TTLDict[K, V](SizedDict[K, V]):
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
+        stale_ttl: float = 0, 
     ):
-        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory)
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
         self.ttl = ttl
         self.is_lru = is_lru
+        self.stale_ttl = stale_ttl
         self._start_time_table: dict[K, float] = {}
 
     def __copy__(self, /) -> Self:
@@ -515,61 +924,154 @@ class TTLDict[K, V](SizedDict[K, V]):
         super().__delitem__(key)
         self._start_time_table.pop(key, None)
 
+    def __contains__(self, key, /) -> bool:
+        try:
+            if not dict.__contains__(self, key):
+                return False
+        except TypeError:
+            return False
+        if self._is_expired(key):
+            if self._is_expired(key, self.stale_ttl):
+                self.discard(key)
+                if (stats := self._stats) is not None:
+                    stats.evictions["ttl"] += 1
+            return False
+        return True
+
     def __getitem__(self, key: K, /) -> V:
         value = super().__getitem__(key)
-        ttl = self.ttl
-        if not (isinf(ttl) or isnan(ttl) or ttl <= 0):
-            try:
-                expired_time = self._start_time_table[key] + ttl
-            except KeyError:
-                pass
-            else:
-                if expired_time <= time():
-                    self.discard(key)
-                    raise CleanedKeyError(key, value)
-        if self.is_lru:
+        if self._is_expired(key):
+            if not self._is_expired(key, self.stale_ttl):
+                raise KeyError(key)
             self.discard(key)
-            self[key] = value
+            if (stats := self._stats) is not None:
+                stats.evictions["ttl"] += 1
+            raise CleanedKeyError(key, value)
+        if self.is_lru:
+            # move to the end and restart the clock, the weight is unchanged, so do not weigh again
+            dict.__setitem__(self, key, dict.pop(self, key))
+            start_time_table = self._start_time_table
+            del start_time_table[key]
+            start_time_table[key] = monotonic()
         return value
 
     def __setitem__(self, key: K, value: V, /):
+        self._put(key, value, monotonic())
+        if self.auto_clean:
+            self.sweep(SWEEP_BATCH_SIZE)
+
+    def _put(self, key: K, value: V, start_time: float, /):
         start_time_table = self._start_time_table
         if self.is_lru:
             self.discard(key)
         else:
             start_time_table.pop(key, None)
         super().__setitem__(key, value)
-        start_time_table[key] = time()
-        if self.auto_clean:
-            self.clean()
+        start_time_table[key] = start_time
 
-    def iter(self, /) -> Iterator[K]:
+    def _store_many(self, pairs: dict[K, V], /):
+        put = self._put
+        now = monotonic()
+        for k, v in pairs.items():
+            put(k, v, now)
+
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
         ttl = self.ttl
         if isinf(ttl) or isnan(ttl) or ttl <= 0:
-            yield from super().iter()
-        else:
-            discard = self.discard
-            watermark = time() - ttl
-            for key, start_time in tuple(self._start_time_table.items()):
-                if start_time <= watermark:
-                    discard(key)
-                else:
-                    yield key
+            return super().get_many(keys)
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        add_missing = missing.append
+        now = monotonic()
+        stale_watermark = now - ttl
+        dead_watermark = stale_watermark - self.stale_ttl
+        start_time_table = self._start_time_table
+        getitem = dict.__getitem__
+        is_lru = self.is_lru
+        n_dead = 0
+        for k in keys:
+            try:
+                start_time = start_time_table[k]
+            except (KeyError, TypeError):
+                add_missing(k)
+                continue
+            if start_time <= stale_watermark:
+                if start_time <= dead_watermark:
+                    self.discard(k)
+                    n_dead += 1
+                add_missing(k)
+            elif is_lru:
+                found[k] = value = dict.pop(self, k)
+                dict.__setitem__(self, k, value)
+                del start_time_table[k]
+                start_time_table[k] = now
+            else:
+                found[k] = getitem(self, k)
+        if n_dead and (stats := self._stats) is not None:
+            stats.evictions["ttl"] += n_dead
+        return found, missing
+
+    def _is_expired(self, key: K, /, grace: float = 0) -> bool:
+        ttl = self.ttl
+        if isinf(ttl) or isnan(ttl) or ttl <= 0:
+            return False
+        try:
+            return self._start_time_table[key] + ttl + grace <= monotonic()
+        except KeyError:
+            return False
+
+    def iter(self, /) -> Iterator[K]:
+        self.sweep()
+        # iterate over a snapshot, so that the loop body may set, get (with `is_lru`) or delete items
+        if self.stale_ttl > 0:
+            watermark = monotonic() - self.ttl
+            return iter([k for k, t in self._start_time_table.items() if t > watermark])
+        return iter(tuple(self._start_time_table))
+
+    def peek(self, key: K, /) -> tuple[V, float]:
+        """get the value (even if stale) and its age in seconds, without counting as an access
+
+        :raises KeyError: if the key is missing, or has been expired for more than `stale_ttl`
+        """
+        if not dict.__contains__(self, key):
+            raise KeyError(key)
+        value = dict.__getitem__(self, key)
+        if self._is_expired(key, self.stale_ttl):
+            self.discard(key)
+            if (stats := self._stats) is not None:
+                stats.evictions["ttl"] += 1
+            raise CleanedKeyError(key, value)
+        return value, monotonic() - self._start_time_table.get(key, inf)
 
     @property
     def start_time_table(self, /) -> MappingProxyType:
-        return MappingProxyType(self._start_time_table)
+        "start times as wall-clock timestamps (they are kept on the monotonic clock)"
+        offset = time() - monotonic()
+        return MappingProxyType({k: t + offset for k, t in self._start_time_table.items()})
 
     def clean(self, /, extra: int = 0) -> list[tuple[K, V]]:
         items = super().clean(extra)
+        # making room for a write only sweeps a bounded batch, so that a write costs O(1)
+        items.extend(self.sweep(SWEEP_BATCH_SIZE if extra > 0 else 0))
+        return items
+
+    def sweep(self, /, limit: int = 0) -> list[tuple[K, V]]:
+        """reclaim expired items, oldest first
+
+        :param limit: at most how many items to reclaim, if <= 0, then no limit
+
+        :return: the reclaimed items
+        """
+        items: list[tuple[K, V]] = []
         ttl = self.ttl
         if self and not (isinf(ttl) or isnan(ttl) or ttl <= 0):
             add_item = items.append
             pop = self.pop
-            watermark = time() - ttl
-            start_time_items = self._start_time_table.items()
+            watermark = monotonic() - ttl - self.stale_ttl
+            start_time_table = self._start_time_table
+            start_time_items = start_time_table.items()
             try:
-                while True:
+                while limit <= 0 or len(items) < limit:
                     try:
                         key, start_time = next(iter(start_time_items))
                         if start_time > watermark:
@@ -577,10 +1079,14 @@ class TTLDict[K, V](SizedDict[K, V]):
                         add_item((key, pop(key)))
                     except CleanedKeyError as e:
                         add_item((e.key, e.value))
-                    except (KeyError, RuntimeError):
+                    except KeyError:
+                        start_time_table.pop(key, None)
+                    except RuntimeError:
                         pass
             except StopIteration:
                 pass
+            if items and (stats := self._stats) is not None:
+                stats.evictions["ttl"] += len(items)
         return items
 
 
@@ -644,7 +1150,7 @@ class Counter[K: Hashable](UserDict[K, int]):
 
 class LFUDict[K: Hashable, V](SizedDict[K, V]):
     "Least Frequently Used (LFU)"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "reset_when_setitem", "reset_when_delitem", "_counter")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "reset_when_setitem", "reset_when_delitem", "_counter")
 
     def __init__(
         self, 
@@ -654,8 +1160,10 @@ class LFUDict[K: Hashable, V](SizedDict[K, V]):
         reset_when_setitem: bool = False, 
         reset_when_delitem: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
-        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory)
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
         self._counter: Counter[K] = Counter()
         self.reset_when_setitem = reset_when_setitem
         self.reset_when_delitem = reset_when_delitem
@@ -683,6 +1191,166 @@ class LFUDict[K: Hashable, V](SizedDict[K, V]):
             self._counter[key] += 1
 
 
+@dataclass(slots=True, eq=False)
+class FreqNode[K]:
+    freq: int
+    keys: dict[K, None] = field(default_factory=dict)
+    prev: FreqNode[K] = field(init=False, repr=False)
+    next: FreqNode[K] = field(init=False, repr=False)
+
+
+class BucketLFUDict[K: Hashable, V](SizedDict[K, V]):
+    """Least Frequently Used (LFU), with O(1) get, set and evict
+
+    Keys with the same access count share a bucket (an ordered dict, the oldest key 
+    comes first), and the buckets form a doubly linked list sorted by the count.
+
+    A deleted key (with `reset_when_delitem=False`) remembers its bucket, so that it 
+    is restored next to that bucket, or else next to the nearest bucket before it.
+
+    .. note::
+        - http://dhruvbird.com/lfu.pdf
+    """
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "reset_when_setitem", "reset_when_delitem", "_head", "_key_to_node", "_freq_to_node", "_deleted_freq")
+
+    def __init__(
+        self, 
+        /, 
+        maxsize: int = 0, 
+        auto_clean: bool = True, 
+        reset_when_setitem: bool = False, 
+        reset_when_delitem: bool = True, 
+        default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
+    ):
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
+        self.reset_when_setitem = reset_when_setitem
+        self.reset_when_delitem = reset_when_delitem
+        head = self._head = FreqNode[K](0)
+        head.prev = head.next = head
+        self._key_to_node: dict[K, FreqNode[K]] = {}
+        self._freq_to_node: dict[int, FreqNode[K]] = {}
+        # the bucket which a deleted key was in, it may have been unlinked since
+        self._deleted_freq: dict[K, FreqNode[K]] = {}
+
+    def __copy__(self, /) -> Self:
+        inst = super().copy()
+        head = inst._head = FreqNode[K](0)
+        head.prev = head.next = head
+        key_to_node = inst._key_to_node = {}
+        freq_to_node = inst._freq_to_node = {}
+        node = self._head.next
+        while node is not self._head:
+            new_node = freq_to_node[node.freq] = FreqNode(node.freq, node.keys.copy())
+            new_node.prev = tail = head.prev
+            new_node.next = head
+            tail.next = head.prev = new_node
+            key_to_node.update(dict.fromkeys(new_node.keys, new_node))
+            node = node.next
+        deleted_freq = inst._deleted_freq = {}
+        for key, node in self._deleted_freq.items():
+            if (new_node := freq_to_node.get(node.freq)) is None:
+                # an unlinked bucket, only its count matters, and the head comes before any bucket
+                new_node = FreqNode(node.freq)
+                new_node.prev = new_node.next = head
+            deleted_freq[key] = new_node
+        return inst
+
+    def __delitem__(self, key: K, /):
+        super().__delitem__(key)
+        node = self._remove_key(key)
+        if node is not None and not self.reset_when_delitem:
+            self._deleted_freq[key] = node
+
+    def __getitem__(self, key: K, /) -> V:
+        value = super().__getitem__(key)
+        self._touch(key)
+        return value
+
+    def __setitem__(self, key: K, value: V, /):
+        super().__setitem__(key, value)
+        self._touch(key, reset=self.reset_when_setitem)
+
+    def _touch(self, key: K, /, reset: bool = False):
+        node = self._key_to_node.get(key)
+        if node is None:
+            node = self._deleted_freq.pop(key, None)
+            if reset or node is None:
+                self._insert_key(key, 1, self._head)
+            else:
+                self._insert_key(key, node.freq + 1, self._linked_node(node))
+        elif reset:
+            if node.freq == 1:
+                keys = node.keys
+                del keys[key]
+                keys[key] = None
+            else:
+                self._remove_key(key)
+                self._insert_key(key, 1, self._head)
+        else:
+            self._insert_key(key, node.freq + 1, node)
+            self._unlink_key(key, node)
+
+    def _insert_key(self, key: K, freq: int, after: FreqNode[K], /):
+        "put `key` into the bucket of `freq`, if there is none, create it after `after` (or a later bucket)"
+        node = self._freq_to_node.get(freq)
+        if node is None:
+            head = self._head
+            node = after.next
+            while node is not head and node.freq < freq:
+                after, node = node, node.next
+            node = self._freq_to_node[freq] = FreqNode(freq)
+            node.prev = after
+            node.next = after.next
+            after.next.prev = node
+            after.next = node
+        node.keys[key] = None
+        self._key_to_node[key] = node
+
+    def _linked_node(self, node: FreqNode[K], /) -> FreqNode[K]:
+        "`node` if it is still linked, or else the nearest linked bucket before it"
+        head = self._head
+        unlinked: list[FreqNode[K]] = []
+        # an unlinked bucket is empty, and still points to the bucket before it at that time
+        while node is not head and not node.keys:
+            unlinked.append(node)
+            node = node.prev
+        # shorten the path for the next time
+        for prev in unlinked:
+            prev.prev = node
+        return node
+
+    def _unlink_key(self, key: K, node: FreqNode[K], /):
+        del node.keys[key]
+        if not node.keys:
+            node.prev.next = node.next
+            node.next.prev = node.prev
+            del self._freq_to_node[node.freq]
+
+    def _remove_key(self, key: K, /) -> None | FreqNode[K]:
+        if node := self._key_to_node.pop(key, None):
+            self._unlink_key(key, node)
+        return node
+
+    def frequency(self, key: K, /) -> int:
+        if node := self._key_to_node.get(key):
+            return node.freq
+        return 0
+
+    def popitem(self, /) -> tuple[K, V]:
+        head = self._head
+        while (node := head.next) is not head:
+            key = next(iter(node.keys))
+            try:
+                return key, self.pop(key)
+            except CleanedKeyError as e:
+                return e.key, e.value
+            except KeyError:
+                self._remove_key(key)
+        raise KeyError(f"{self!r} is empty")
+
+
 @dataclass(slots=True, order=True)
 class KeyPriority[F, K]:
     priority: F
@@ -692,7 +1360,8 @@ class KeyPriority[F, K]:
 
 class PriorityDict[K: Hashable, V](SizedDict[K, V]):
     "each value with a priority value"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "prioritize", "watermarker", "is_lru", "_heap", "_key_to_entry")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "prioritize", "watermarker", "is_lru", "_heap", "_key_to_entry")
+    _expire_reason: str = "priority"
 
     def __init__(
         self, 
@@ -703,8 +1372,10 @@ class PriorityDict[K: Hashable, V](SizedDict[K, V]):
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
-        super().__init__(maxsize, auto_clean, default_factory=default_factory)
+        super().__init__(maxsize, auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
         self.prioritize = prioritize
         self.watermarker = watermarker
         self.is_lru = is_lru
@@ -724,13 +1395,18 @@ class PriorityDict[K: Hashable, V](SizedDict[K, V]):
     def __getitem__(self, key: K) -> V:
         value = super().__getitem__(key)
         if watermarker := self.watermarker:
-            priority = self.prioritize(key, value)
+            if entry := self._key_to_entry.get(key):
+                priority = entry.priority
+            else:
+                priority = self.prioritize(key, value)
             if watermarker() >= priority:
                 self.discard(key)
+                if (stats := self._stats) is not None:
+                    stats.evictions[self._expire_reason] += 1
                 raise CleanedKeyError(key, value)
         if self.is_lru:
-            self.discard(key)
-            self[key] = value
+            # not `self[key] = value`, a re-insertion on hit is not an insertion (see `with_stats`)
+            PriorityDict.__setitem__(self, key, value)
         return value
 
     def __setitem__(self, key: K, value: V, /):
@@ -739,6 +1415,42 @@ class PriorityDict[K: Hashable, V](SizedDict[K, V]):
         super().__setitem__(key, value)
         self._add_entry(key, value)
 
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
+        watermarker = self.watermarker
+        if not watermarker or self.is_lru:
+            return super().get_many(keys)
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        add_missing = missing.append
+        watermark = watermarker()
+        key_to_entry = self._key_to_entry
+        prioritize = self.prioritize
+        contains = dict.__contains__
+        getitem = dict.__getitem__
+        n_expired = 0
+        for k in keys:
+            try:
+                if not contains(self, k):
+                    add_missing(k)
+                    continue
+            except TypeError:
+                add_missing(k)
+                continue
+            value = getitem(self, k)
+            if entry := key_to_entry.get(k):
+                priority = entry.priority
+            else:
+                priority = prioritize(k, value)
+            if watermark >= priority:
+                self.discard(k)
+                n_expired += 1
+                add_missing(k)
+            else:
+                found[k] = value
+        if n_expired and (stats := self._stats) is not None:
+            stats.evictions[self._expire_reason] += n_expired
+        return found, missing
+
     def _add_entry(self, key: K, value: V, /) -> KeyPriority:
         self._discard_entry(key)
         entry = self._key_to_entry[key] = KeyPriority(self.prioritize(key, value), key)
@@ -780,12 +1492,24 @@ class PriorityDict[K: Hashable, V](SizedDict[K, V]):
 
     def clean(self, /, extra: int = 0) -> list[tuple[K, V]]:
         items = super().clean(extra)
+        # making room for a write only sweeps a bounded batch, so that a write costs O(1)
+        items.extend(self.sweep(SWEEP_BATCH_SIZE if extra > 0 else 0))
+        return items
+
+    def sweep(self, /, limit: int = 0) -> list[tuple[K, V]]:
+        """reclaim items whose priority is not above the watermark, lowest first
+
+        :param limit: at most how many items to reclaim, if <= 0, then no limit
+
+        :return: the reclaimed items
+        """
+        items: list[tuple[K, V]] = []
         add_item = items.append
         if watermarker := self.watermarker:
             heap = self._heap
             watermark = watermarker()
             try:
-                while True:
+                while limit <= 0 or len(items) < limit:
                     entry = heap[0]
                     key = entry.key
                     if key is not undefined and watermark < entry.priority:
@@ -795,36 +1519,48 @@ class PriorityDict[K: Hashable, V](SizedDict[K, V]):
                         continue
                     elif entry is not entry1:
                         heappush(heap, entry1)
-                        return items
+                        break
                     key = cast(K, entry.key)
                     add_item((key, self.pop(key)))
             except CleanedKeyError as e:
                 add_item((e.key, e.value))
             except LookupError:
                 pass
+            if items and (stats := self._stats) is not None:
+                stats.evictions[self._expire_reason] += len(items)
         return items
 
 
 class ExpireDict[K, V](PriorityDict[K, V]):
     "each value with an expiration timestamp"
-    __slots__ = ("maxsize", "auto_clean", "default_factory", "prioritize", "watermarker", "is_lru", "_heap", "_key_to_entry")
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "prioritize", "watermarker", "is_lru", "_heap", "_key_to_entry")
+    _expire_reason: str = "ttl"
 
     def __init__(
         self, 
         /, 
         expire_timer: float | Callable[[K, V], float] = lambda _, v, /: v[0], # type: ignore
-        watermarker: float | Callable[[], float] = time, 
+        watermarker: None | float | Callable[[], float] = None, 
         is_lru: bool = False, 
         maxsize: int = 0, 
         auto_clean: bool = True, 
         default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
+        # a fixed ttl uses the monotonic clock, so clock jumps cannot expire everything at once, 
+        # unless a `watermarker` is given, whose wall-clock timestamps must be comparable
+        clock: Callable[[], float] = time
         if isinstance(expire_timer, (int, float)) or not callable(expire_timer):
             ttl = expire_timer
-            expire_timer = lambda *_: time() + ttl
-        if isinstance(watermarker, (int, float)) or not callable(watermarker):
+            if watermarker is None or isinstance(watermarker, (int, float)) or not callable(watermarker):
+                clock = monotonic
+            expire_timer = lambda *_, clock=clock: clock() + ttl
+        if watermarker is None:
+            watermarker = clock
+        elif isinstance(watermarker, (int, float)) or not callable(watermarker):
             offset = watermarker
-            watermarker = lambda: time() + offset
+            watermarker = lambda: clock() + offset
         super().__init__(
             prioritize=expire_timer, 
             watermarker=watermarker, 
@@ -832,45 +1568,219 @@ class ExpireDict[K, V](PriorityDict[K, V]):
             maxsize=maxsize, 
             auto_clean=auto_clean, 
             default_factory=default_factory, 
+            maxweight=maxweight, 
+            weigher=weigher, 
         )
 
 
 TLRUDict = ExpireDict
 
-# TODO: ARCDict: Adaptive Replacement Cache (CC), LRU -> LFU
+
+class ARCDict[K: Hashable, V](SizedDict[K, V]):
+    """Adaptive Replacement Cache (ARC), scan-resistant
+
+    Items seen once live in T1, items seen at least twice live in T2, and the keys 
+    recently evicted from them are remembered (without values) in B1 and B2. A hit 
+    in B1 (or B2) grows (or shrinks) the target size `p` of T1, so a one-time scan 
+    only churns T1 and the frequently used items in T2 survive.
+
+    .. note::
+        - https://www.usenix.org/legacy/events/fast03/tech/full_papers/megiddo/megiddo.pdf
+    """
+    __slots__ = ("maxsize", "auto_clean", "default_factory", "maxweight", "weigher", "_weights", "_total_weight", "_stats", "_p", "_t1", "_t2", "_b1", "_b2")
+
+    def __init__(
+        self, 
+        /, 
+        maxsize: int = 0, 
+        auto_clean: bool = True, 
+        default_factory: None | Callable[[], V] = None, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
+    ):
+        super().__init__(maxsize, auto_clean=auto_clean, default_factory=default_factory, maxweight=maxweight, weigher=weigher)
+        self._p = 0
+        self._t1: dict[K, None] = {}
+        self._t2: dict[K, None] = {}
+        self._b1: dict[K, None] = {}
+        self._b2: dict[K, None] = {}
+
+    def __copy__(self, /) -> Self:
+        inst = super().copy()
+        inst._t1 = copy(self._t1)
+        inst._t2 = copy(self._t2)
+        inst._b1 = copy(self._b1)
+        inst._b2 = copy(self._b2)
+        return inst
+
+    def __delitem__(self, key: K, /):
+        super().__delitem__(key)
+        if self._t1.pop(key, undefined) is undefined:
+            self._t2.pop(key, None)
+
+    def __getitem__(self, key: K, /) -> V:
+        value = super().__getitem__(key)
+        t2 = self._t2
+        if self._t1.pop(key, undefined) is undefined:
+            t2.pop(key, None)
+        t2[key] = None
+        return value
+
+    def __setitem__(self, key: K, value: V, /):
+        t1, t2, b1, b2 = self._t1, self._t2, self._b1, self._b2
+        if key in t1 or key in t2:
+            super().__setitem__(key, value)
+            if t1.pop(key, undefined) is undefined:
+                t2.pop(key, None)
+            t2[key] = None
+            # the weight evictions may have evicted `key` itself into a ghost list
+            if b2.pop(key, undefined) is undefined:
+                b1.pop(key, None)
+            return
+        c = self.maxsize
+        if c <= 0:
+            super().__setitem__(key, value)
+            t1[key] = None
+            return
+        full = len(t1) + len(t2) >= c
+        if key in b1:
+            self._p = min(c, self._p + max(1, len(b2) // len(b1)))
+            del b1[key]
+            if full:
+                self._evict(False)
+            super().__setitem__(key, value)
+            t2[key] = None
+        elif key in b2:
+            self._p = max(0, self._p - max(1, len(b1) // len(b2)))
+            del b2[key]
+            if full:
+                self._evict(True)
+            super().__setitem__(key, value)
+            t2[key] = None
+        else:
+            if len(t1) + len(b1) >= c:
+                if len(t1) < c:
+                    del b1[next(iter(b1))]
+                    if full:
+                        self._evict(False)
+                else:
+                    self.discard(next(iter(t1)))
+                    if (stats := self._stats) is not None:
+                        stats.evictions["size"] += 1
+            else:
+                if len(t1) + len(t2) + len(b1) + len(b2) >= 2 * c and b2:
+                    del b2[next(iter(b2))]
+                if full:
+                    self._evict(False)
+            super().__setitem__(key, value)
+            t1[key] = None
+        # the weight evictions above ran before `key` was counted in T1 or T2
+        self._trim_ghosts()
+
+    def _evict(self, /, in_b2: bool = False):
+        self._replace(in_b2)
+        if (stats := self._stats) is not None:
+            stats.evictions["size"] += 1
+
+    def _replace(self, /, in_b2: bool = False) -> tuple[K, V]:
+        t1 = self._t1
+        if t1 and (len(t1) > self._p or (in_b2 and len(t1) == self._p) or not self._t2):
+            key = next(iter(t1))
+            ghost = self._b1
+        elif self._t2:
+            key = next(iter(self._t2))
+            ghost = self._b2
+        else:
+            raise KeyError(f"{self!r} is empty")
+        item = key, self.pop(key)
+        if self.maxsize > 0:
+            ghost[key] = None
+            self._trim_ghosts()
+        return item
+
+    def _trim_ghosts(self, /):
+        """drop the oldest ghost keys, so that |T1| + |B1| <= c and |T1| + |T2| + |B1| + |B2| <= 2c
+
+        Evictions for the size keep these bounds already, but evictions for the weight 
+        (or a smaller `maxsize`) may not.
+        """
+        c = self.maxsize
+        t1, t2, b1, b2 = self._t1, self._t2, self._b1, self._b2
+        while b1 and len(t1) + len(b1) > c:
+            del b1[next(iter(b1))]
+        while (b1 or b2) and len(t1) + len(t2) + len(b1) + len(b2) > 2 * c:
+            ghost = b2 or b1
+            del ghost[next(iter(ghost))]
+
+    def popitem(self, /) -> tuple[K, V]:
+        return self._replace()
+
+
 # TODO: TwoQDict: Two Queues (2Q), FIFO -> LRU
 # TODO: LRUKDict: Least Recently Used at least K times (LRU-K), LFU -> LRU
 # TODO: LFU with each item add_time, use (add_time, count) to calculate a priority value
 # TODO: LFU with each item access_time, use (access_time, count) to calculate a priority value
 
 class FastFIFODict[K: Hashable, V](dict[K, V]):
-    __slots__ = ("maxsize", "auto_clean")
+    __slots__ = ("maxsize", "auto_clean", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def __init__(
         self, 
         /, 
         maxsize: int = 0, 
         auto_clean: bool = True, 
+        maxweight: int = 0, 
+        weigher: None | Callable[[K, V], int] = None, 
     ):
         self.maxsize = maxsize
         self.auto_clean = auto_clean
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self._weights: dict[K, int] = {}
+        self._total_weight = 0
+        self._stats: None | CacheStats = None
 
     def __repr__(self, /) -> str:
         return super().__repr__()
 
+    def __delitem__(self, key: K, /):
+        super().__delitem__(key)
+        if self._weights:
+            self._total_weight -= self._weights.pop(key, 0)
+
     def __setitem__(self, key: K, value: V, /):
-        super().pop(key, None)
-        self.clean(1)
-        super().__setitem__(key, value)
+        if (maxweight := self.maxweight) > 0:
+            weight = (self.weigher or default_weigher)(key, value)
+            self.pop(key, None)
+            if weight > maxweight:
+                raise ValueError(f"weight of {key!r} is {weight}, exceeding maxweight={maxweight!r}")
+            self.clean(1, weight)
+            super().__setitem__(key, value)
+            self._weights[key] = weight
+            self._total_weight += weight
+        else:
+            super().pop(key, None)
+            self.clean(1)
+            super().__setitem__(key, value)
+
+    @property
+    def weight(self, /) -> int:
+        "total weight of all items (always 0 if `maxweight` <= 0)"
+        return self._total_weight
 
-    def clean(self, /, extra: int = 0):
+    def clean(self, /, extra: int = 0, extra_weight: int = 0):
         maxsize = self.maxsize
+        maxweight = self.maxweight
+        stats = self._stats
+        pop = self.pop if maxweight > 0 else super().pop
         if self and maxsize > 0:
             remains = maxsize - extra
             if remains <= 0:
-                super().clear()
+                if stats is not None:
+                    stats.evictions["size"] += len(self)
+                self.clear()
             else:
-                pop = super().pop
+                n = len(self)
                 while len(self) > remains:
                     try:
                         pop(next(iter(self)), None)
@@ -878,13 +1788,78 @@ class FastFIFODict[K: Hashable, V](dict[K, V]):
                         pass
                     except StopIteration:
                         break
+                if stats is not None and n > len(self):
+                    stats.evictions["size"] += n - len(self)
+        if maxweight > 0:
+            remains = maxweight - extra_weight
+            n = len(self)
+            while self._total_weight > remains:
+                try:
+                    pop(next(iter(self)), None)
+                except (KeyError, RuntimeError):
+                    pass
+                except StopIteration:
+                    break
+            if stats is not None and n > len(self):
+                stats.evictions["weight"] += n - len(self)
+
+    def clear(self, /):
+        super().clear()
+        self._weights.clear()
+        self._total_weight = 0
+
+    def delete_many(self, keys: Iterable[K], /) -> dict[K, V]:
+        """remove many keys at once, missing keys are ignored
+
+        :return: the removed items
+        """
+        removed: dict[K, V] = {}
+        pop = self.pop
+        for k in keys:
+            try:
+                removed[k] = pop(k)
+            except (KeyError, TypeError):
+                pass
+        return removed
+
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
+        """look up many keys at once
+
+        :return: 2-tuple, the found items and the missing keys
+        """
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        add_missing = missing.append
+        getitem = self.__getitem__
+        for k in keys:
+            try:
+                found[k] = getitem(k)
+            except (KeyError, TypeError):
+                add_missing(k)
+        return found, missing
+
+    @overload
+    def pop(self, key: K, /, default: Undefined = undefined) -> V:
+        ...
+    @overload
+    def pop(self, key: K, /, default: V) -> V:
+        ...
+    @overload
+    def pop[T](self, key: K, /, default: T) -> V | T:
+        ...
+    def pop[T](self, key: K, /, default: Undefined | V | T = undefined) -> V | T:
+        if self._weights:
+            self._total_weight -= self._weights.pop(key, 0)
+        if default is undefined:
+            return super().pop(key)
+        return super().pop(key, cast(V | T, default))
 
     def popitem(self, /) -> tuple[K, V]:
         try:
             while True:
                 try:
                     key = next(iter(self))
-                    return key, super().pop(key)
+                    return key, self.pop(key)
                 except (KeyError, RuntimeError):
                     pass
         except StopIteration:
@@ -892,12 +1867,47 @@ class FastFIFODict[K: Hashable, V](dict[K, V]):
         raise KeyError(f"{self!r} is empty")
 
     def setdefault(self, key: K, default: V, /) -> V:
+        if self.maxweight > 0:
+            try:
+                return super().__getitem__(key)
+            except KeyError:
+                self[key] = default
+                return default
         value = super().setdefault(key, default)
         if self.auto_clean:
             self.clean()
         return value
 
+    def set_many(self, items: Mapping[K, V] | Iterable[tuple[K, V]], /):
+        """set many items at once, making room for all of them in a single eviction pass
+
+        If there are more items than `maxsize`, only the last `maxsize` ones are kept.
+        """
+        if isinstance(items, Mapping):
+            items = items.items()
+        if self.maxweight > 0:
+            for k, v in items:
+                self[k] = v
+            return
+        pairs = dict(items)
+        if (maxsize := self.maxsize) > 0 and len(pairs) > maxsize:
+            pairs = dict(islice(pairs.items(), len(pairs) - maxsize, None))
+        pop = dict.pop
+        for k in pairs:
+            pop(self, k, None)
+        self.clean(len(pairs))
+        dict.update(self, pairs)
+
     def update(self, /, *args, **pairs):
+        if self.maxweight > 0:
+            cache: dict = {}
+            for arg in args:
+                if arg:
+                    cache.update(arg)
+            cache.update(pairs)
+            for k, v in cache.items():
+                self[k] = v
+            return
         update = super().update
         for arg in args:
             if arg:
@@ -908,11 +1918,11 @@ class FastFIFODict[K: Hashable, V](dict[K, V]):
 
 
 class FastLRUDict[K: Hashable, V](FastFIFODict[K, V]):
-    __slots__ = ("maxsize", "auto_clean")
+    __slots__ = ("maxsize", "auto_clean", "maxweight", "weigher", "_weights", "_total_weight", "_stats")
 
     def __getitem__(self, key: K, /) -> V:
-        value = super().pop(key)
-        super().__setitem__(key, value)
+        value = dict.pop(self, key)
+        dict.__setitem__(self, key, value)
         return value
 
     @overload
@@ -932,3 +1942,989 @@ class FastLRUDict[K: Hashable, V](FastFIFODict[K, V]):
         self[key] = value
         return value
 
+
+def _stats_snapshot(stats: CacheStats, size: int, weight: int, /) -> dict:
+    lookups = stats.hits + stats.misses
+    return {
+        "hits": stats.hits, 
+        "misses": stats.misses, 
+        "hit_rate": stats.hits / lookups if lookups else 0.0, 
+        "insertions": stats.insertions, 
+        "evictions": dict(stats.evictions), 
+        "miss_time": stats.miss_time, 
+        "size": size, 
+        "weight": weight, 
+    }
+
+
+@cache
+def with_stats[C: SizedDict | FastFIFODict](cls: type[C], /) -> type[C]:
+    """make a subclass of `cls` which collects statistics
+
+    Caches created from other classes only pay one attribute check on eviction, 
+    while this subclass also counts hits and misses in `__getitem__`, insertions 
+    in `__setitem__`, evictions by reason ("size", "weight", "ttl", "priority"), 
+    and the time spent computing misses when used as a memoizer.
+
+    .. code:: python
+
+        cache = with_stats(LRUDict)(maxsize=1024)
+        cache.stats()
+    """
+    class StatsDict(cls): # type: ignore
+        __slots__ = ()
+
+        def __init__(self, /, *args, **kwds):
+            super().__init__(*args, **kwds)
+            self._stats = CacheStats()
+
+        def __getitem__(self, key, /):
+            # the policies reorder the key on a hit without calling `__setitem__`, so it is not counted as an insertion
+            try:
+                value = super().__getitem__(key)
+            except KeyError:
+                self._stats.misses += 1
+                raise
+            self._stats.hits += 1
+            return value
+
+        if hasattr(cls, "peek"):
+            def peek(self, key, /):
+                # the memoizer reads by `peek` for refresh-ahead and stale-while-revalidate
+                try:
+                    result = super().peek(key)
+                except KeyError:
+                    self._stats.misses += 1
+                    raise
+                self._stats.hits += 1
+                return result
+
+        def __setitem__(self, key, value, /):
+            super().__setitem__(key, value)
+            self._stats.insertions += 1
+
+        def get(self, key, /, default=None):
+            try:
+                return self[key]
+            except KeyError:
+                return default
+
+        def get_many(self, keys, /):
+            stats = self._stats
+            # some policies look up each key by `__getitem__`, which counts too
+            hits, misses = stats.hits, stats.misses
+            found, missing = super().get_many(keys)
+            stats.hits = hits + len(found)
+            stats.misses = misses + len(missing)
+            return found, missing
+
+        def set_many(self, items, /):
+            if isinstance(items, Mapping):
+                items = items.items()
+            pairs = dict(items)
+            stats = self._stats
+            insertions = stats.insertions
+            super().set_many(pairs)
+            stats.insertions = insertions + len(pairs)
+
+        def stats(self, /) -> dict:
+            "a snapshot of the statistics"
+            return _stats_snapshot(self._stats, dict.__len__(self), self.weight)
+
+        def reset_stats(self, /):
+            self._stats.reset()
+
+    StatsDict.__name__ = f"{cls.__name__}WithStats"
+    StatsDict.__qualname__ = f"{cls.__qualname__}WithStats"
+    StatsDict.__module__ = cls.__module__
+    return cast(type[C], StatsDict)
+
+
+def _split(total: int, n: int, /) -> list[int]:
+    if total <= 0:
+        return [0] * n
+    q, r = divmod(total, n)
+    return [q + (i < r) for i in range(n)]
+
+
+class ShardedDict[K: Hashable, V](MutableMapping[K, V]):
+    """hash-partitioned shards of SizedDict, each guarded by its own lock
+
+    The total `maxsize` (and `maxweight`) is split across the shards, so the whole 
+    dictionary never exceeds them, while operations on different shards do not 
+    contend for the same lock (and do not rely on the GIL).
+    """
+    __slots__ = ("maxsize", "maxweight", "_shards", "_locks", "_stats")
+
+    def __init__(
+        self, 
+        /, 
+        policy: Callable[..., SizedDict[K, V]] = LRUDict, 
+        shards: int = 16, 
+        maxsize: int = 0, 
+        maxweight: int = 0, 
+        **policy_kwargs, 
+    ):
+        if shards <= 0:
+            raise ValueError(f"shards must be a positive integer, got {shards!r}")
+        if maxsize > 0:
+            shards = min(shards, maxsize)
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self._shards: tuple[SizedDict[K, V], ...] = tuple(
+            policy(maxsize=size, maxweight=weight, **policy_kwargs) 
+            for size, weight in zip(_split(maxsize, shards), _split(maxweight, shards))
+        )
+        self._locks: tuple[Lock, ...] = tuple(Lock() for _ in range(shards))
+        self._stats: None | CacheStats = None
+        if all(getattr(shard, "_stats", None) is not None for shard in self._shards):
+            self._stats = CacheStats()
+
+    __call__ = SizedDict.__call__
+
+    def __contains__(self, key, /) -> bool:
+        try:
+            shard, lock = self._locate(key)
+        except TypeError:
+            return False
+        with lock:
+            return key in shard
+
+    def __delitem__(self, key: K, /):
+        shard, lock = self._locate(key)
+        with lock:
+            del shard[key]
+
+    def __getitem__(self, key: K, /) -> V:
+        shard, lock = self._locate(key)
+        with lock:
+            return shard[key]
+
+    def __iter__(self, /) -> Iterator[K]:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                keys = tuple(shard.keys())
+            yield from keys
+
+    def __len__(self, /) -> int:
+        total = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total += len(shard)
+        return total
+
+    def __repr__(self, /) -> str:
+        cls = type(self)
+        maxsize = self.maxsize
+        shards = len(self._shards)
+        return f"<{cls.__module__}.{cls.__qualname__}({maxsize=!r}, {shards=!r}) object at {hex(id(self))} with {len(self)} items>"
+
+    def __setitem__(self, key: K, value: V, /):
+        shard, lock = self._locate(key)
+        with lock:
+            shard[key] = value
+
+    @property
+    def weight(self, /) -> int:
+        return sum(shard.weight for shard in self._shards)
+
+    def _group[T](
+        self, 
+        pairs: Iterable[tuple[K, T]], 
+        /, 
+        unhashable: None | list = None, 
+    ) -> dict[int, dict[K, T]]:
+        """group the pairs by shard
+
+        :param unhashable: if not None, collect the unhashable keys into it, instead of raising TypeError
+        """
+        groups: dict[int, dict[K, T]] = defaultdict(dict)
+        n = len(self._shards)
+        for k, v in pairs:
+            try:
+                i = hash(k) % n
+            except TypeError:
+                if unhashable is None:
+                    raise
+                unhashable.append(k)
+                continue
+            groups[i][k] = v
+        return groups
+
+    def _locate(self, key, /) -> tuple[SizedDict[K, V], Lock]:
+        i = hash(key) % len(self._shards)
+        return self._shards[i], self._locks[i]
+
+    @property
+    def shards(self, /) -> tuple[SizedDict[K, V], ...]:
+        return self._shards
+
+    def clean(self, /) -> list[tuple[K, V]]:
+        items: list[tuple[K, V]] = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                items.extend(shard.clean())
+        return items
+
+    def clear(self, /):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def delete_many(self, keys: Iterable[K], /) -> dict[K, V]:
+        "remove many keys at once, taking the lock of each shard only once"
+        removed: dict[K, V] = {}
+        # unhashable keys are missing, so ignored
+        for i, group in self._group(((k, None) for k in keys), []).items():
+            with self._locks[i]:
+                removed.update(self._shards[i].delete_many(group))
+        return removed
+
+    def discard(self, key, /):
+        try:
+            shard, lock = self._locate(key)
+        except TypeError:
+            return
+        with lock:
+            shard.discard(key)
+
+    @overload
+    def get(self, key: K, /, default: None = None) -> None | V:
+        ...
+    @overload
+    def get[T](self, key: K, /, default: T) -> V | T:
+        ...
+    def get[T](self, key: K, /, default: None | V | T = None) -> None | V | T:
+        shard, lock = self._locate(key)
+        with lock:
+            return shard.get(key, default)
+
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
+        "look up many keys at once, taking the lock of each shard only once"
+        found: dict[K, V] = {}
+        missing: list[K] = []
+        # unhashable keys are missing
+        for i, group in self._group(((k, None) for k in keys), missing).items():
+            with self._locks[i]:
+                found1, missing1 = self._shards[i].get_many(group)
+            found.update(found1)
+            missing.extend(missing1)
+        return found, missing
+
+    def items(self, /) -> list[tuple[K, V]]: # type: ignore[override]
+        items: list[tuple[K, V]] = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                items.extend(shard.items())
+        return items
+
+    def keys(self, /) -> list[K]: # type: ignore[override]
+        return list(self)
+
+    @overload
+    def pop(self, key: K, /, default: Undefined = undefined) -> V:
+        ...
+    @overload
+    def pop(self, key: K, /, default: V) -> V:
+        ...
+    @overload
+    def pop[T](self, key: K, /, default: T) -> V | T:
+        ...
+    def pop[T](self, key: K, /, default: Undefined | V | T = undefined) -> V | T:
+        shard, lock = self._locate(key)
+        with lock:
+            return shard.pop(key, default)
+
+    def popitem(self, /) -> tuple[K, V]:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                if shard:
+                    try:
+                        return shard.popitem()
+                    except KeyError:
+                        pass
+        raise KeyError(f"{self!r} is empty")
+
+    def setdefault(self, key: K, default: V, /) -> V:
+        shard, lock = self._locate(key)
+        with lock:
+            return shard.setdefault(key, default)
+
+    def set_many(self, items: Mapping[K, V] | Iterable[tuple[K, V]], /):
+        "set many items at once, taking the lock of each shard only once"
+        if isinstance(items, Mapping):
+            items = items.items()
+        for i, group in self._group(items).items():
+            with self._locks[i]:
+                self._shards[i].set_many(group)
+
+    def stats(self, /) -> dict:
+        "statistics summed over all shards, requires a `policy` made by `with_stats`"
+        total = self._stats
+        if total is None:
+            raise TypeError(f"statistics are not enabled for {self!r}")
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total += cast(CacheStats, shard._stats)
+        return _stats_snapshot(total, len(self), self.weight)
+
+    def reset_stats(self, /):
+        if self._stats is None:
+            raise TypeError(f"statistics are not enabled for {self!r}")
+        self._stats.reset()
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.reset_stats() # type: ignore
+
+    def sweep(self, /, limit: int = 0) -> list[tuple[K, V]]:
+        items: list[tuple[K, V]] = []
+        for shard, lock in zip(self._shards, self._locks):
+            if limit > 0 and len(items) >= limit:
+                break
+            if sweep := getattr(shard, "sweep", None):
+                with lock:
+                    items.extend(sweep(limit - len(items) if limit > 0 else 0))
+        return items
+
+    def update(self, /, *args, **pairs):
+        cache: dict = {}
+        update = cache.update
+        m: Any
+        for m in filter(None, args):
+            update(m)
+        if pairs:
+            update(pairs)
+        self.set_many(cache)
+
+    def values(self, /) -> list[V]: # type: ignore[override]
+        values: list[V] = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                values.extend(shard.values())
+        return values
+
+
+class _ProcessLock:
+    """an exclusive lock, shared by all threads and processes on the host which use the same `name`
+
+    It is based on `fcntl.flock` of a lock file in the temporary directory, and falls back 
+    to a `multiprocessing.Lock` (which only works for the processes forked or spawned by 
+    its creator) if `fcntl` is unavailable.
+    """
+    __slots__ = ("name", "path", "_thread_lock", "_fd", "_pid", "_mp_lock")
+
+    def __init__(self, name: str, /):
+        self.name = name
+        self.path = joinpath(gettempdir(), f"{name}.lock")
+        self._thread_lock = Lock()
+        self._fd = -1
+        self._pid = 0
+        self._mp_lock = None if flock else MPLock()
+
+    def __reduce__(self, /):
+        return type(self), (self.name,)
+
+    def __enter__(self, /):
+        self._thread_lock.acquire()
+        if flock:
+            try:
+                # a forked child must not share the open file description of its parent
+                if self._pid != (pid := getpid()):
+                    self._fd = os_open(self.path, O_RDWR | O_CREAT, 0o666)
+                    self._pid = pid
+                flock(self._fd, LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        else:
+            cast(MPLock, self._mp_lock).acquire()
+        return self
+
+    def __exit__(self, /, *exc_info):
+        try:
+            if flock:
+                flock(self._fd, LOCK_UN)
+            else:
+                cast(MPLock, self._mp_lock).release()
+        finally:
+            self._thread_lock.release()
+
+
+def _blake2b64(data: bytes, /) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest())
+
+
+def _open_shared_memory(name: str, /, size: int = 0) -> SharedMemory:
+    """open (or create if `size` > 0) a shared memory block, which outlives the current process
+
+    The resource tracker would otherwise destroy the block when the process which 
+    first opened it exits, even though the other processes still use it.
+    """
+    if version_info >= (3, 13):
+        return SharedMemory(name, create=size > 0, size=size, track=False)
+    shm = SharedMemory(name, create=size > 0, size=size)
+    from multiprocessing.resource_tracker import unregister
+    unregister(shm._name, "shared_memory") # type: ignore
+    return shm
+
+
+def _unlink_shared_memory(shm: SharedMemory, /):
+    "destroy a shared memory block opened by `_open_shared_memory`"
+    if version_info < (3, 13) and platform != "win32":
+        # `SharedMemory.unlink` unregisters the block from the resource tracker, 
+        # which would complain about a block already unregistered, so register it again
+        from multiprocessing.resource_tracker import register
+        register(shm._name, "shared_memory") # type: ignore
+    shm.unlink()
+
+
+def _attach_shared_dict(cls, name, lock, key_dumps, key_loads, dumps, loads, /):
+    return cls(name, create=False, lock=lock, key_dumps=key_dumps, key_loads=key_loads, dumps=dumps, loads=loads)
+
+
+class SharedDict[K: Hashable, V](MutableMapping[K, V]):
+    """a cache in shared memory, so that all processes on the host can share it
+
+    The storage is a `multiprocessing.shared_memory.SharedMemory` block, which holds 
+    an open-addressing hash table of fixed-size slots. Each slot contains the serialized 
+    key and value, an access tick (for approximated LRU eviction) and the time of setting 
+    (for TTL expiration). All operations run under a process-safe lock.
+
+    .. code:: python
+
+        # in each worker process
+        cache = SharedDict("my-cache", maxsize=10_000, slot_size=1024, ttl=300)
+
+        @cache
+        def get_user(uid: int) -> dict:
+            ...
+
+    .. note::
+        - Keys are compared by their serialized bytes, so `1`, `1.0` and `True` are different keys
+        - An item, whose serialized size exceeds the slot, is rejected with `ValueError`
+        - The process that creates the block should call `unlink()` when it is no longer needed
+
+    When attaching to an existing block, its `maxsize`, `slot_size` and `ttl` are used.
+
+    :param name: the name of the shared memory block, if None, create a new block with a random name
+    :param maxsize: at most how many items, the table has twice as many slots (to keep probe sequences short)
+    :param slot_size: bytes of a slot, including a header of 36 bytes
+    :param ttl: seconds for an item to live, if not positive or inf, items do not expire
+    :param create: if True, create the block; if False, attach to it; if None, attach or else create
+    :param lock: a process-safe lock, if None, use a file lock named after `name`
+    :param key_dumps: serialize a key into bytes
+    :param key_loads: deserialize bytes into a key
+    :param dumps: serialize a value into bytes
+    :param loads: deserialize bytes into a value
+    """
+    __slots__ = ("name", "maxsize", "slot_size", "ttl", "lock", "key_dumps", "key_loads", "dumps", "loads", "_shm", "_buf", "_nslots")
+
+    # magic, number of slots, slot size, maxsize, count, tick, ttl
+    _HEADER: Final = Struct("<8sIIIIQd")
+    _COUNT: Final = Struct("<I")
+    _TICK: Final = Struct("<Q")
+    # state, key size, value size, hash of key, access tick, setting time
+    _SLOT: Final = Struct("<B3xIIQQd")
+    _SLOT_ACCESS: Final = Struct("<Qd")
+    _MAGIC: Final = b"cachedct"
+    _EMPTY: Final = 0
+    _USED: Final = 1
+
+    def __init__(
+        self, 
+        name: None | str = None, 
+        /, 
+        maxsize: int = 1024, 
+        slot_size: int = 512, 
+        ttl: float = inf, 
+        create: None | bool = None, 
+        lock: None | AbstractContextManager = None, 
+        key_dumps: Callable[[K], bytes] = partial(pickle_dumps, protocol=5), 
+        key_loads: Callable[[bytes], K] = pickle_loads, 
+        dumps: Callable[[V], bytes] = partial(pickle_dumps, protocol=5), 
+        loads: Callable[[bytes], V] = pickle_loads, 
+    ):
+        if name is None:
+            if create is False:
+                raise ValueError("name is required to attach to an existing block")
+            name = f"cachedict_{token_hex(8)}"
+            create = True
+        if lock is None:
+            lock = _ProcessLock(name)
+        self.name = name
+        self.lock = lock
+        self.key_dumps = key_dumps
+        self.key_loads = key_loads
+        self.dumps = dumps
+        self.loads = loads
+        header = self._HEADER
+        with lock:
+            shm = None
+            if not create:
+                try:
+                    shm = _open_shared_memory(name)
+                except FileNotFoundError:
+                    if create is False:
+                        raise
+            if shm is None:
+                if maxsize <= 0:
+                    raise ValueError(f"maxsize must be a positive integer, got {maxsize!r}")
+                if slot_size <= self._SLOT.size:
+                    raise ValueError(f"slot_size must be greater than {self._SLOT.size}, got {slot_size!r}")
+                nslots = 2 * maxsize
+                shm = _open_shared_memory(name, header.size + nslots * slot_size)
+                header.pack_into(shm.buf, 0, self._MAGIC, nslots, slot_size, maxsize, 0, 0, ttl)
+            else:
+                magic, nslots, slot_size, maxsize, _, _, ttl = header.unpack_from(shm.buf, 0)
+                if magic != self._MAGIC:
+                    shm.close()
+                    raise ValueError(f"shared memory {name!r} is not a SharedDict")
+        self._shm = shm
+        self._buf = shm.buf
+        self._nslots = nslots
+        self.maxsize = maxsize
+        self.slot_size = slot_size
+        self.ttl = ttl
+
+    def __reduce__(self, /):
+        return _attach_shared_dict, (type(self), self.name, self.lock, self.key_dumps, self.key_loads, self.dumps, self.loads)
+
+    __call__ = SizedDict.__call__
+
+    def __contains__(self, key, /) -> bool:
+        try:
+            kb = self.key_dumps(key)
+        except Exception:
+            return False
+        with self.lock:
+            return self._find(kb, _blake2b64(kb), time())[0] >= 0
+
+    def __delitem__(self, key: K, /):
+        kb = self.key_dumps(key)
+        with self.lock:
+            i = self._find(kb, _blake2b64(kb), time())[0]
+            if i < 0:
+                raise KeyError(key)
+            self._delete(i)
+
+    def __enter__(self, /) -> Self:
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
+    def __getitem__(self, key: K, /) -> V:
+        kb = self.key_dumps(key)
+        with self.lock:
+            i = self._find(kb, _blake2b64(kb), time())[0]
+            if i < 0:
+                raise KeyError(key)
+            vb = self._touch(i)
+        return self.loads(vb)
+
+    def __iter__(self, /) -> Iterator[K]:
+        with self.lock:
+            keys = [kb for kb, _, _ in self._iter_used(time())]
+        return map(self.key_loads, keys)
+
+    def __len__(self, /) -> int:
+        return self._COUNT.unpack_from(self._buf, 20)[0]
+
+    def __repr__(self, /) -> str:
+        cls = type(self)
+        name = self.name
+        maxsize = self.maxsize
+        return f"<{cls.__module__}.{cls.__qualname__}({name!r}, {maxsize=!r}) object at {hex(id(self))} with {len(self)} items>"
+
+    def __setitem__(self, key: K, value: V, /):
+        kb = self.key_dumps(key)
+        vb = self.dumps(value)
+        with self.lock:
+            self._store(kb, vb, time())
+
+    def _set_count(self, delta: int, /):
+        self._COUNT.pack_into(self._buf, 20, len(self) + delta)
+
+    def _next_tick(self, /) -> int:
+        tick = self._TICK.unpack_from(self._buf, 24)[0] + 1
+        self._TICK.pack_into(self._buf, 24, tick)
+        return tick
+
+    def _offset(self, i: int, /) -> int:
+        return self._HEADER.size + i * self.slot_size
+
+    def _is_expired(self, set_time: float, now: float, /) -> bool:
+        ttl = self.ttl
+        return 0 < ttl < inf and set_time + ttl <= now
+
+    def _find(self, kb: bytes, h: int, now: float, /) -> tuple[int, int]:
+        """find the slot of the key (-1 if missing), and the first empty slot on its probe sequence
+
+        An expired item is deleted on sight.
+        """
+        buf = self._buf
+        unpack_from = self._SLOT.unpack_from
+        header_size = self._HEADER.size
+        slot_size = self.slot_size
+        size = self._SLOT.size
+        klen = len(kb)
+        n = self._nslots
+        i = h % n
+        for _ in range(n):
+            offset = header_size + i * slot_size
+            state, klen1, _, h1, _, set_time = unpack_from(buf, offset)
+            if state == self._EMPTY:
+                return -1, i
+            elif h1 == h and klen1 == klen and buf[offset+size:offset+size+klen] == kb:
+                if not self._is_expired(set_time, now):
+                    return i, -1
+                self._delete(i)
+                return self._find(kb, h, now)
+            i = (i + 1) % n
+        return -1, -1
+
+    def _touch(self, i: int, /) -> bytes:
+        "update the access tick of the slot, and return the serialized value"
+        buf = self._buf
+        offset = self._offset(i)
+        _, klen, vlen, h, _, set_time = self._SLOT.unpack_from(buf, offset)
+        self._SLOT.pack_into(buf, offset, self._USED, klen, vlen, h, self._next_tick(), set_time)
+        start = offset + self._SLOT.size + klen
+        return bytes(buf[start:start+vlen])
+
+    def _delete(self, i: int, /):
+        """empty the slot, then shift the following items of the cluster backward if their 
+        probe sequences pass through it, so that no tombstone is needed
+        """
+        buf = self._buf
+        unpack_from = self._SLOT.unpack_from
+        header_size = self._HEADER.size
+        slot_size = self.slot_size
+        n = self._nslots
+        j = i
+        while True:
+            j = (j + 1) % n
+            offset = header_size + j * slot_size
+            state, _, _, h, _, _ = unpack_from(buf, offset)
+            if state == self._EMPTY:
+                break
+            home = h % n
+            # the item stays, iff its home slot is cyclically in (i, j]
+            if i < home <= j if i < j else (home > i or home <= j):
+                continue
+            start = header_size + i * slot_size
+            buf[start:start+slot_size] = buf[offset:offset+slot_size]
+            i = j
+        buf[header_size + i * slot_size] = self._EMPTY
+        self._set_count(-1)
+
+    def _store(self, kb: bytes, vb: bytes, now: float, /):
+        size = self._SLOT.size
+        if size + len(kb) + len(vb) > self.slot_size:
+            h = _blake2b64(kb)
+            if (i := self._find(kb, h, now)[0]) >= 0:
+                self._delete(i)
+            raise ValueError(f"serialized item takes {size + len(kb) + len(vb)} bytes, exceeding slot_size={self.slot_size!r}")
+        h = _blake2b64(kb)
+        i, free = self._find(kb, h, now)
+        if i < 0:
+            if len(self) >= self.maxsize:
+                self._evict(now)
+                i, free = self._find(kb, h, now)
+            i = free
+            self._set_count(1)
+        offset = self._offset(i)
+        buf = self._buf
+        self._SLOT.pack_into(buf, offset, self._USED, len(kb), len(vb), h, self._next_tick(), now)
+        start = offset + size
+        buf[start:start+len(kb)] = kb
+        start += len(kb)
+        buf[start:start+len(vb)] = vb
+
+    def _evict(self, now: float, /, samples: int = 5):
+        "evict an expired item, or else the least recently used one among a few sampled items"
+        buf = self._buf
+        unpack_from = self._SLOT_ACCESS.unpack_from
+        header_size = self._HEADER.size
+        slot_size = self.slot_size
+        n = self._nslots
+        i = randrange(n)
+        victim = -1
+        oldest = 0
+        for _ in range(n):
+            offset = header_size + i * slot_size
+            if buf[offset] == self._USED:
+                tick, set_time = unpack_from(buf, offset + 20)
+                if self._is_expired(set_time, now):
+                    victim = i
+                    break
+                if victim < 0 or tick < oldest:
+                    victim, oldest = i, tick
+                samples -= 1
+                if samples <= 0:
+                    break
+            i = (i + 1) % n
+        if victim >= 0:
+            self._delete(victim)
+
+    def _iter_used(self, now: float, /) -> Iterator[tuple[bytes, int, float]]:
+        "yield the serialized key, the slot index and the setting time of each unexpired item"
+        buf = self._buf
+        unpack_from = self._SLOT.unpack_from
+        size = self._SLOT.size
+        for i in range(self._nslots):
+            offset = self._offset(i)
+            state, klen, _, _, _, set_time = unpack_from(buf, offset)
+            if state == self._USED and not self._is_expired(set_time, now):
+                yield bytes(buf[offset+size:offset+size+klen]), i, set_time
+
+    def clean(self, /) -> list[tuple[K, V]]:
+        return self.sweep()
+
+    def clear(self, /):
+        with self.lock:
+            buf = self._buf
+            for i in range(self._nslots):
+                buf[self._offset(i)] = self._EMPTY
+            self._set_count(-len(self))
+
+    def close(self, /):
+        "detach from the shared memory block (the block itself remains)"
+        self._shm.close()
+
+    def delete_many(self, keys: Iterable[K], /) -> dict[K, V]:
+        """remove many keys at once, missing keys are ignored
+
+        :return: the removed items
+        """
+        removed: dict[K, bytes] = {}
+        key_dumps = self.key_dumps
+        pairs = [(k, key_dumps(k)) for k in keys]
+        now = time()
+        with self.lock:
+            for k, kb in pairs:
+                if (i := self._find(kb, _blake2b64(kb), now)[0]) >= 0:
+                    removed[k] = self._touch(i)
+                    self._delete(i)
+        loads = self.loads
+        return {k: loads(vb) for k, vb in removed.items()}
+
+    def discard(self, key, /):
+        try:
+            del self[key]
+        except Exception:
+            pass
+
+    @overload
+    def get(self, key: K, /, default: None = None) -> None | V:
+        ...
+    @overload
+    def get[T](self, key: K, /, default: T) -> V | T:
+        ...
+    def get[T](self, key: K, /, default: None | V | T = None) -> None | V | T:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_many(self, keys: Iterable[K], /) -> tuple[dict[K, V], list[K]]:
+        """look up many keys at once, under a single acquisition of the lock
+
+        :return: 2-tuple, the found items and the missing keys
+        """
+        found: dict[K, bytes] = {}
+        missing: list[K] = []
+        key_dumps = self.key_dumps
+        pairs = [(k, key_dumps(k)) for k in keys]
+        now = time()
+        with self.lock:
+            for k, kb in pairs:
+                if (i := self._find(kb, _blake2b64(kb), now)[0]) >= 0:
+                    found[k] = self._touch(i)
+                else:
+                    missing.append(k)
+        loads = self.loads
+        return {k: loads(vb) for k, vb in found.items()}, missing
+
+    def items(self, /) -> list[tuple[K, V]]: # type: ignore[override]
+        key_loads, loads = self.key_loads, self.loads
+        return [(key_loads(kb), loads(vb)) for kb, vb in self._snapshot()]
+
+    def keys(self, /) -> list[K]: # type: ignore[override]
+        return list(self)
+
+    def peek(self, key: K, /) -> tuple[V, float]:
+        """get the value and its age in seconds, without counting as an access
+
+        :raises KeyError: if the key is missing or expired
+        """
+        kb = self.key_dumps(key)
+        now = time()
+        with self.lock:
+            i = self._find(kb, _blake2b64(kb), now)[0]
+            if i < 0:
+                raise KeyError(key)
+            offset = self._offset(i)
+            _, klen, vlen, _, _, set_time = self._SLOT.unpack_from(self._buf, offset)
+            start = offset + self._SLOT.size + klen
+            vb = bytes(self._buf[start:start+vlen])
+        return self.loads(vb), now - set_time
+
+    @overload
+    def pop(self, key: K, /, default: Undefined = undefined) -> V:
+        ...
+    @overload
+    def pop(self, key: K, /, default: V) -> V:
+        ...
+    @overload
+    def pop[T](self, key: K, /, default: T) -> V | T:
+        ...
+    def pop[T](self, key: K, /, default: Undefined | V | T = undefined) -> V | T:
+        if removed := self.delete_many((key,)):
+            return removed[key]
+        if default is undefined:
+            raise KeyError(key)
+        return cast(V | T, default)
+
+    def popitem(self, /) -> tuple[K, V]:
+        "remove and return the least recently used item"
+        now = time()
+        with self.lock:
+            buf = self._buf
+            unpack_from = self._SLOT.unpack_from
+            victim = -1
+            oldest = 0
+            for _, i, _ in self._iter_used(now):
+                tick = unpack_from(buf, self._offset(i))[4]
+                if victim < 0 or tick < oldest:
+                    victim, oldest = i, tick
+            if victim < 0:
+                raise KeyError(f"{self!r} is empty")
+            offset = self._offset(victim)
+            klen = unpack_from(buf, offset)[1]
+            start = offset + self._SLOT.size
+            kb = bytes(buf[start:start+klen])
+            vb = self._touch(victim)
+            self._delete(victim)
+        return self.key_loads(kb), self.loads(vb)
+
+    def set_many(self, items: Mapping[K, V] | Iterable[tuple[K, V]], /):
+        "set many items at once, under a single acquisition of the lock"
+        if isinstance(items, Mapping):
+            items = items.items()
+        key_dumps, dumps = self.key_dumps, self.dumps
+        pairs = [(key_dumps(k), dumps(v)) for k, v in items]
+        now = time()
+        with self.lock:
+            for kb, vb in pairs:
+                self._store(kb, vb, now)
+
+    def _snapshot(self, /) -> list[tuple[bytes, bytes]]:
+        now = time()
+        with self.lock:
+            buf = self._buf
+            unpack_from = self._SLOT.unpack_from
+            size = self._SLOT.size
+            pairs: list[tuple[bytes, bytes]] = []
+            for kb, i, _ in self._iter_used(now):
+                offset = self._offset(i)
+                _, klen, vlen, _, _, _ = unpack_from(buf, offset)
+                start = offset + size + klen
+                pairs.append((kb, bytes(buf[start:start+vlen])))
+        return pairs
+
+    def sweep(self, /, limit: int = 0) -> list[tuple[K, V]]:
+        """reclaim expired items
+
+        :param limit: at most how many items to reclaim, if <= 0, then no limit
+
+        :return: the reclaimed items
+        """
+        expired: list[tuple[bytes, bytes]] = []
+        ttl = self.ttl
+        if 0 < ttl < inf:
+            now = time()
+            with self.lock:
+                buf = self._buf
+                unpack_from = self._SLOT.unpack_from
+                size = self._SLOT.size
+                i = 0
+                while i < self._nslots and not 0 < limit <= len(expired):
+                    offset = self._offset(i)
+                    state, klen, vlen, _, _, set_time = unpack_from(buf, offset)
+                    if state == self._USED and self._is_expired(set_time, now):
+                        start = offset + size
+                        expired.append((bytes(buf[start:start+klen]), bytes(buf[start+klen:start+klen+vlen])))
+                        # another item may be shifted into this slot
+                        self._delete(i)
+                    else:
+                        i += 1
+        key_loads, loads = self.key_loads, self.loads
+        return [(key_loads(kb), loads(vb)) for kb, vb in expired]
+
+    def unlink(self, /):
+        "destroy the shared memory block, call it once in one process after all others have closed it"
+        _unlink_shared_memory(self._shm)
+        if isinstance(lock := self.lock, _ProcessLock):
+            with suppress(FileNotFoundError):
+                remove(lock.path)
+
+    def values(self, /) -> list[V]: # type: ignore[override]
+        loads = self.loads
+        return [loads(vb) for _, vb in self._snapshot()]
+
+
+def start_sweeper(
+    cache: TTLDict | PriorityDict | ShardedDict | SharedDict, 
+    /, 
+    interval: float = 1, 
+    batch: int = 1024, 
+    lock: None | AbstractContextManager = None, 
+) -> Event:
+    """start a daemon thread, which periodically reclaims expired items of `cache`
+
+    .. note::
+        Only ShardedDict and SharedDict guard themselves with locks, other caches are not thread-safe, 
+        so they require the `lock` which every other access to `cache` also holds.
+
+    :param cache: a cache with a `sweep` method
+    :param interval: seconds to wait between two rounds
+    :param batch: reclaim at most so many items at a time
+    :param lock: the lock guarding `cache`, required unless it is a ShardedDict or SharedDict
+
+    :return: an event, set it to stop the sweeper
+    """
+    if lock is None:
+        if not isinstance(cache, (ShardedDict, SharedDict)):
+            raise TypeError(f"{type(cache).__qualname__} is not thread-safe, pass the `lock` guarding it")
+        sweep = cache.sweep
+    else:
+        def sweep(limit: int, /) -> list:
+            with lock:
+                return cache.sweep(limit)
+    stopped = Event()
+    def run():
+        while not stopped.wait(interval):
+            while len(sweep(batch)) >= batch > 0 and not stopped.is_set():
+                pass
+    Thread(target=run, daemon=True).start()
+    return stopped
+
+
+async def async_sweeper(
+    cache: TTLDict | PriorityDict | ShardedDict | SharedDict, 
+    /, 
+    interval: float = 1, 
+    batch: int = 1024, 
+):
+    """periodically reclaim expired items of `cache`, run it as an asyncio task
+
+    :param cache: a cache with a `sweep` method
+    :param interval: seconds to wait between two rounds
+    :param batch: reclaim at most so many items at a time, and yield to the event loop between batches
+    """
+    sweep = cache.sweep
+    while True:
+        await async_sleep(interval)
+        while len(sweep(batch)) >= batch > 0:
+            await async_sleep(0)
@@ -0,0 +1,20 @@
+from random import Random
+
+from cachedict import ARCDict
+
+
+def test_ghost_lists_stay_bounded_under_weight_pressure():
+    rng = Random(3)
+    c = 20
+    d = ARCDict(maxsize=c, maxweight=100, weigher=lambda k, v: v)
+    t1, t2, b1, b2 = d._t1, d._t2, d._b1, d._b2
+    for _ in range(20000):
+        k = rng.randrange(60)
+        if rng.random() < 0.3 and k in d:
+            d[k]
+        else:
+            d[k] = rng.choice((1, 1, 1, 5, 50, 100))
+        assert d.weight <= 100
+        assert len(t1) + len(b1) <= c
+        assert len(t1) + len(t2) + len(b1) + len(b2) <= 2 * c
+        assert not (t1.keys() | t2.keys()) & (b1.keys() | b2.keys())
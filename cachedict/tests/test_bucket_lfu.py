@@ -0,0 +1,45 @@
+from random import Random
+
+from cachedict import BucketLFUDict
+
+
+def test_deleted_key_restores_its_frequency():
+    d = BucketLFUDict(reset_when_delitem=False)
+    d["a"] = d["b"] = 0
+    for _ in range(4):
+        d["a"]
+    assert d.frequency("a") == 5
+    del d["a"]
+    # the bucket of "a" is gone, and another one is created before it
+    for _ in range(2):
+        d["b"]
+    d["a"] = 0
+    assert d.frequency("a") == 6
+    assert d.frequency("b") == 3
+    assert d.popitem() == ("b", 0)
+    assert d.popitem() == ("a", 0)
+
+
+def test_frequencies_match_a_plain_counter():
+    rng = Random(0)
+    d = BucketLFUDict(reset_when_delitem=False)
+    counts: dict[int, int] = {}
+    deleted: dict[int, int] = {}
+    for _ in range(5000):
+        key = rng.randrange(50)
+        if key in counts and rng.random() < 0.2:
+            del d[key]
+            deleted[key] = counts.pop(key)
+        elif key in counts:
+            d[key]
+            counts[key] += 1
+        else:
+            d[key] = key
+            counts[key] = deleted.pop(key, 0) + 1
+    for key, freq in counts.items():
+        assert d.frequency(key) == freq
+    freqs = []
+    while d:
+        key, _ = d.popitem()
+        freqs.append(counts[key])
+    assert freqs == sorted(freqs)
@@ -0,0 +1,22 @@
+from cachedict import make_key_builder
+
+
+def test_parameter_names_do_not_collide():
+    def f(a, r=0): ...
+    key = make_key_builder(f)
+    assert key(1, r=2) != key(1, r=3)
+    assert hash(key(1, r=2)) == hash(key(1, r=2))
+
+    def g(url, type=None): ...
+    key = make_key_builder(g, typed=True)
+    assert key("u", type="json") == (("url", "u", str), ("type", "json", str))
+
+    def h(tuple, x=1, *map, **kwds): ...
+    for typed in (False, True):
+        key = make_key_builder(h, typed=typed)
+        assert key(1, 2, 3, z=4) == key(1, 2, 3, z=4)
+        assert key(1) != key(1, 2)
+
+    def i(_r, _tuple, _type, _map, _undefined=0): ...
+    key = make_key_builder(i, typed=True)
+    assert key(1, 2, 3, 4) == (("_r", 1, int), ("_tuple", 2, int), ("_type", 3, int), ("_map", 4, int))
@@ -0,0 +1,80 @@
+from asyncio import gather, run, sleep as async_sleep
+from threading import Event, Thread
+from time import perf_counter, sleep
+
+from cachedict import LRUDict
+
+
+def test_single_flight_does_not_block_other_keys():
+    cache = LRUDict(128)
+    started = Event()
+    @cache
+    def slow(key):
+        if key == "x":
+            started.set()
+            sleep(0.5)
+        return key
+    t = Thread(target=slow, args=("x",))
+    t.start()
+    started.wait()
+    t0 = perf_counter()
+    assert slow("y") == "y"
+    assert perf_counter() - t0 < 0.3
+    # a concurrent miss on the same key waits for the first call
+    assert slow("x") == "x"
+    t.join()
+
+
+def test_recursive_memoized_function_from_threads():
+    cache = LRUDict(128)
+    @cache
+    def fib(n):
+        sleep(0.01)
+        return n if n < 2 else fib(n - 1) + fib(n - 2)
+    results: list[int] = []
+    threads = [Thread(target=lambda: results.append(fib(8)), daemon=True) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert not any(t.is_alive() for t in threads)
+    assert results == [21, 21]
+
+
+class BrokenStore(LRUDict):
+    __slots__ = ()
+
+    def __setitem__(self, key, value, /):
+        raise TypeError("cannot store")
+
+
+def test_waiters_get_the_result_when_storing_fails():
+    cache = BrokenStore(128)
+    @cache
+    def slow(key):
+        sleep(0.1)
+        return key
+    results: list = []
+    def call():
+        try:
+            results.append(slow(1))
+        except TypeError as e:
+            results.append(e)
+    threads = [Thread(target=call, daemon=True) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert not any(t.is_alive() for t in threads)
+    assert len(results) == 3 and results.count(1) >= 2
+
+
+def test_async_waiters_get_the_result_when_storing_fails():
+    cache = BrokenStore(128)
+    @cache
+    async def slow(key):
+        await async_sleep(0.1)
+        return key
+    async def main():
+        return await gather(*(slow(1) for _ in range(3)))
+    assert run(main()) == [1, 1, 1]
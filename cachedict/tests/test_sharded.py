@@ -0,0 +1,19 @@
+from cachedict import ShardedDict, SizedDict
+
+
+def test_get_many_with_unhashable_keys():
+    for d in (SizedDict(), ShardedDict(maxsize=10)):
+        d[1] = 1
+        found, missing = d.get_many([1, [1], 2])
+        assert found == {1: 1}
+        assert sorted(map(str, missing)) == ["2", "[1]"]
+        assert d.delete_many([[1], 1]) == {1: 1}
+
+
+def test_update_with_default_arguments():
+    d = ShardedDict()
+    d.update({1: 1}, b=2)
+    assert dict(d.items()) == {1: 1, "b": 2}
+    d = ShardedDict(shards=2, maxweight=10, weigher=lambda k, v: 1)
+    d.update([(1, 1), (2, 2)])
+    assert len(d) == 2
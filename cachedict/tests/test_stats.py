@@ -0,0 +1,29 @@
+from time import sleep
+
+from cachedict import LRUDict, PriorityDict, TTLDict, with_stats
+
+
+def test_hits_do_not_count_as_insertions():
+    for cache in (with_stats(LRUDict)(8), with_stats(TTLDict)(60, is_lru=True), with_stats(PriorityDict)(lambda k, v: k, is_lru=True)):
+        cache[1] = 1
+        cache[2] = 2
+        for _ in range(5):
+            cache[1]
+        stats = cache.stats()
+        assert stats["hits"] == 5
+        assert stats["insertions"] == 2
+
+
+def test_refresh_ahead_hits_are_counted():
+    cache = with_stats(TTLDict)(0.05)
+    @cache(refresh_ahead=0.5)
+    def f(x):
+        return x
+    f(1)
+    for _ in range(3):
+        f(1)
+    sleep(0.03)
+    f(1)
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 4
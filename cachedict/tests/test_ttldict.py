@@ -0,0 +1,74 @@
+from threading import Lock
+from time import sleep, time
+
+from pytest import raises
+
+from cachedict import ExpireDict, PriorityDict, TTLDict, SWEEP_BATCH_SIZE, start_sweeper
+
+
+def test_iter_allows_mutation():
+    for is_lru in (False, True):
+        d = TTLDict(60, is_lru=is_lru)
+        for i in range(10):
+            d[i] = i
+        for k in d.iter():
+            d[k] = k + 1
+        for k in d.iter():
+            d[k]
+        assert sorted(d.items()) == [(i, i + 1) for i in range(10)]
+        for k in d.iter():
+            del d[k]
+        assert not d
+
+
+def test_iter_allows_mutation_with_stale_ttl():
+    d = TTLDict(60, stale_ttl=10)
+    for i in range(5):
+        d[i] = i
+    for k in d.iter():
+        d[k] = -k
+    assert sorted(d.values()) == [-4, -3, -2, -1, 0]
+
+
+def test_write_sweeps_a_bounded_batch():
+    d = TTLDict(0.01)
+    for i in range(1000):
+        d[i] = i
+    watermark = [-1]
+    p = PriorityDict(watermarker=lambda: watermark[0])
+    for i in range(1000):
+        p[i] = i
+    sleep(0.02)
+    watermark[0] = 1
+    d["new"] = p["new"] = 1
+    # at most a batch for the new key and a batch after the write
+    assert len(d) >= 1001 - 2 * SWEEP_BATCH_SIZE
+    assert len(p) >= 1001 - 2 * SWEEP_BATCH_SIZE
+    assert list(d.values()) == [1]
+    assert not p.values()
+
+
+def test_expire_dict_with_wall_clock_watermarker():
+    d = ExpireDict(60, watermarker=time)
+    d[1] = 1
+    assert d[1] == 1
+    d = ExpireDict(60)
+    d[1] = 1
+    assert d[1] == 1
+
+
+def test_start_time_table_is_wall_clock():
+    d = TTLDict(60)
+    d[1] = 1
+    assert abs(d.start_time_table[1] - time()) < 1
+
+
+def test_sweeper_requires_lock():
+    d = TTLDict(0.01)
+    with raises(TypeError):
+        start_sweeper(d)
+    d[1] = 1
+    stopped = start_sweeper(d, interval=0.01, lock=Lock())
+    sleep(0.1)
+    stopped.set()
+    assert not dict.__len__(d)
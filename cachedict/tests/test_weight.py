@@ -0,0 +1,28 @@
+from cachedict import LRUDict, TTLDict
+
+
+def test_hits_do_not_weigh_again():
+    calls = 0
+    def weigher(key, value):
+        nonlocal calls
+        calls += 1
+        return len(value)
+    for cache in (LRUDict(maxweight=100, weigher=weigher), TTLDict(60, is_lru=True, maxweight=100, weigher=weigher)):
+        calls = 0
+        cache["a"] = "x" * 10
+        cache["b"] = "y" * 10
+        for _ in range(1000):
+            cache["a"]
+        assert calls == 2
+        assert cache.weight == 20
+        assert list(cache) == ["b", "a"]
+
+
+def test_lru_hit_keeps_the_key_from_eviction():
+    cache = LRUDict(maxweight=100, weigher=lambda k, v: len(v))
+    cache["a"] = "x" * 10
+    cache["b"] = "y" * 10
+    cache["a"]
+    cache["c"] = "z" * 85
+    assert "a" in cache and "b" not in cache
+    assert cache.weight == 95
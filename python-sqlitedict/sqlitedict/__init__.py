@@ -3,20 +3,55 @@
 
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
 __version__ = (0, 0, 3)
-__all__ = ["SqliteDict", "SqliteTableDict"]
+__all__ = [
+    "SqliteDict", "ShardedSqliteDict", "SqliteTableDict", "TieredDict", "AsyncSqliteDict", 
+    "Codec", "train_zstd_dict", 
+]
 
-from collections.abc import Callable, Iterator, MutableMapping
-from sqlite3 import connect, register_adapter, register_converter, Connection, Cursor
+from asyncio import get_running_loop, Future
+from collections.abc import Buffer, Callable, Iterable, Iterator, Mapping, MutableMapping
+from contextlib import contextmanager, suppress
+from functools import partial
+from itertools import chain
+from math import inf
+from operator import itemgetter
+from os import fsdecode, makedirs
+from os.path import join as joinpath
+from pickle import dumps as pickle_dumps, loads as pickle_loads
+from queue import Empty, SimpleQueue
+from sqlite3 import adapt, connect, register_adapter, register_converter, Connection, Cursor
+from threading import local, Lock, Thread
+from time import monotonic, time
+from typing import Any, Final, Literal, NamedTuple
+from weakref import finalize, ref
+from zlib import crc32
 
+from cachedict import LRUDict, SizedDict
 from orjson import dumps, loads
-from sqlitetools import enclose, execute, find, query, AutoCloseConnection, AutoCloseCursor
+from sqlitetools import enclose, execute, to_uri, AutoCloseConnection, AutoCloseCursor
 from undefined import undefined
 
+try:
+    from msgpack import packb, unpackb
+except ImportError:
+    packb = unpackb = None # type: ignore
+try:
+    from zstandard import train_dictionary, ZstdCompressionDict, ZstdCompressor, ZstdDecompressor
+except ImportError:
+    train_dictionary = ZstdCompressionDict = ZstdCompressor = ZstdDecompressor = None # type: ignore
+
 
 register_adapter(dict, dumps)
 register_adapter(list, dumps)
 register_converter("JSON", loads)
 
+#: marks a buffered deletion in the write buffer of SqliteDict
+_DELETED = object()
+#: at most so many keys are bound to one statement by the multi-key methods
+MAX_KEYS_PER_STATEMENT = 500
+#: the current unix timestamp (in seconds), as a SQL expression
+_NOW: Final = "(julianday('now') - 2440587.5) * 86400.0"
+
 
 def call_with_lock(lock, func, /, *args, **kwds):
     if lock is None:
@@ -25,7 +60,262 @@ def call_with_lock(lock, func, /, *args, **kwds):
         return func(*args, **kwds)
 
 
+@contextmanager
+def _committing(cur: Cursor, /):
+    """a transaction around the with-block, committed on exit
+
+    If the connection is already in a transaction, the with-block joins it, and leaves 
+    the commit or rollback to whoever opened it.
+    """
+    if cur.connection.in_transaction:
+        yield cur
+        return
+    cur.execute("BEGIN")
+    try:
+        yield cur
+        cur.execute("COMMIT")
+    except BaseException:
+        if cur.connection.in_transaction:
+            with suppress(Exception):
+                cur.execute("ROLLBACK")
+        raise
+
+
+def _stored_key_bytes(key, /) -> bytes:
+    """the bytes of the value which sqlite stores for `key`, keys which sqlite compares 
+    as equal (e.g. `True`, `1` and `1.0`) give the same bytes
+    """
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        return b"%d" % key
+    elif isinstance(key, float):
+        return repr(key).encode("ascii")
+    elif isinstance(key, str):
+        return key.encode("utf-8")
+    elif isinstance(key, Buffer):
+        return bytes(key)
+    try:
+        adapted = adapt(key)
+    except Exception:
+        return repr(key).encode("utf-8")
+    if adapted is key:
+        return repr(key).encode("utf-8")
+    return _stored_key_bytes(adapted)
+
+
+def _readonly_uri(dbfile, uri: bool = False, /) -> str:
+    "the URI to open `dbfile` in read-only mode"
+    dbfile = fsdecode(dbfile)
+    if dbfile in ("", ":memory:") or uri and "mode=memory" in dbfile:
+        raise ValueError(f"an in-memory database cannot be opened by another connection: {dbfile!r}")
+    if not uri:
+        return to_uri(dbfile, "mode=ro")
+    return dbfile + ("&" if "?" in dbfile else "?") + "mode=ro"
+
+
+class _ThreadToken:
+    "lives in a thread-local, so it is collected when its thread exits"
+    __slots__ = ("__weakref__",)
+
+
+def _discard_reader(pool_ref: ref, con: Connection, /):
+    if (pool := pool_ref()) is None:
+        with suppress(Exception):
+            con.close()
+    else:
+        pool._discard(con)
+
+
+class _ReaderPool:
+    """lazily open a read-only connection for each thread, so that readers do not serialize on one connection
+
+    A connection is closed once its thread exits.
+    """
+
+    def __init__(
+        self, 
+        dbfile, 
+        /, 
+        uri: bool = False, 
+        timeout: int | float = float("inf"), 
+        row_factory: None | Callable = None, 
+        factory: type[Connection] = Connection, 
+    ):
+        self.uri = _readonly_uri(dbfile, uri)
+        self.timeout = timeout
+        self.row_factory = row_factory
+        self.factory = factory
+        self._local = local()
+        self._connections: list[Connection] = []
+        self._lock = Lock()
+
+    def get(self, /) -> Connection:
+        try:
+            return self._local.con
+        except AttributeError:
+            pass
+        # check_same_thread=False only lets close() run in another thread
+        con = connect(
+            self.uri, 
+            uri=True, 
+            check_same_thread=False, 
+            timeout=self.timeout, 
+            factory=self.factory, 
+        )
+        if self.row_factory is not None:
+            con.row_factory = self.row_factory
+        self._local.con = con
+        with self._lock:
+            self._connections.append(con)
+        # close the connection, once the thread exits (and its thread-locals are collected)
+        token = self._local.token = _ThreadToken()
+        finalize(token, _discard_reader, ref(self), con)
+        return con
+
+    def _discard(self, con: Connection, /):
+        with self._lock:
+            with suppress(ValueError):
+                self._connections.remove(con)
+        with suppress(Exception):
+            con.close()
+
+    def close(self, /):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        self._local = local()
+        for con in connections:
+            con.close()
+
+
+class Codec:
+    """serialize values into bytes, which start with a tag byte telling how to deserialize them
+
+    Buffers (bytes, bytearray, memoryview) are stored as they are, other values are 
+    serialized by `serializer`. A payload of at least `compress_threshold` bytes is 
+    compressed by zstd (if that makes it smaller), optionally with a trained dictionary. 
+    Since the tag goes with each value, values written with other settings stay readable.
+
+    .. code:: python
+
+        codec = Codec("msgpack", compress_threshold=1024)
+        d = SqliteDict("data.db", key_dumps=dumps, key_loads=loads, value_dumps=codec.dumps, value_loads=codec.loads)
+
+    :param serializer: "json" (by orjson), "msgpack" (requires msgpack) or "pickle" (protocol 5)
+    :param compress_threshold: compress payloads of at least so many bytes (requires zstandard), if <= 0, never compress
+    :param level: the zstd compression level
+    :param zstd_dict: a zstd dictionary (e.g. made by `train_zstd_dict`), which must be the same for writing and reading
+    """
+    RAW: Final = 0
+    JSON: Final = 1
+    MSGPACK: Final = 2
+    PICKLE: Final = 3
+    ZSTD: Final = 0x80
+
+    def __init__(
+        self, 
+        /, 
+        serializer: Literal["json", "msgpack", "pickle"] = "json", 
+        compress_threshold: int = 0, 
+        level: int = 3, 
+        zstd_dict: None | bytes = None, 
+    ):
+        match serializer:
+            case "json":
+                self._tag, self._serialize = self.JSON, dumps
+            case "msgpack":
+                if packb is None:
+                    raise ImportError("serializer='msgpack' requires msgpack: pip install msgpack")
+                self._tag, self._serialize = self.MSGPACK, packb
+            case "pickle":
+                self._tag, self._serialize = self.PICKLE, partial(pickle_dumps, protocol=5)
+            case _:
+                raise ValueError(f"unknown serializer: {serializer!r}")
+        if compress_threshold > 0 and ZstdCompressor is None:
+            raise ImportError("compression requires zstandard: pip install zstandard")
+        self.serializer = serializer
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self.zstd_dict = zstd_dict
+        # zstd (de)compressors must not be used by several threads at the same time
+        self._local = local()
+
+    def _zstd(self, /) -> tuple[Any, Any]:
+        try:
+            return self._local.zstd
+        except AttributeError:
+            pass
+        if ZstdCompressor is None:
+            raise ImportError("reading a compressed value requires zstandard: pip install zstandard")
+        dict_data = None if self.zstd_dict is None else ZstdCompressionDict(self.zstd_dict)
+        zstd = self._local.zstd = (
+            ZstdCompressor(level=self.level, dict_data=dict_data), 
+            ZstdDecompressor(dict_data=dict_data), 
+        )
+        return zstd
+
+    def dumps(self, value, /) -> bytes:
+        if isinstance(value, Buffer):
+            tag, data = self.RAW, bytes(value)
+        else:
+            tag, data = self._tag, self._serialize(value)
+        if 0 < self.compress_threshold <= len(data):
+            compressed = self._zstd()[0].compress(data)
+            if len(compressed) < len(data):
+                tag, data = tag | self.ZSTD, compressed
+        return tag.to_bytes() + data
+
+    def loads(self, data: bytes, /):
+        tag = data[0]
+        body: Buffer = memoryview(data)[1:]
+        if tag & self.ZSTD:
+            body = self._zstd()[1].decompress(body)
+            tag &= ~self.ZSTD
+        match tag:
+            case self.RAW:
+                return bytes(body)
+            case self.JSON:
+                return loads(body)
+            case self.MSGPACK:
+                if unpackb is None:
+                    raise ImportError("reading a msgpack value requires msgpack: pip install msgpack")
+                return unpackb(body)
+            case self.PICKLE:
+                return pickle_loads(body)
+            case _:
+                raise ValueError(f"unknown codec tag: {data[0]:#04x}")
+
+
+def train_zstd_dict(samples: Iterable[bytes], /, size: int = 112_640) -> bytes:
+    """train a zstd dictionary from sample payloads (e.g. `Codec(compress_threshold=0).dumps(value)[1:]`), 
+    which helps to compress many small and similar values
+    """
+    if train_dictionary is None:
+        raise ImportError("training a dictionary requires zstandard: pip install zstandard")
+    return train_dictionary(size, list(samples)).as_bytes()
+
+
 class SqliteDict(MutableMapping):
+    """a dict-like which stores the items in a sqlite3 database
+
+    With `write_behind > 0`, writes (and deletions) are buffered in memory, and then 
+    written with `executemany` in one transaction, when the buffer has `write_behind` 
+    items, or the oldest buffered write is `flush_interval` seconds old, or on `flush()`, 
+    `close()` and context exit. Reads see buffered writes, while `len()` and iteration 
+    flush first. The `flush_interval` is checked on each read and write, there is no 
+    timer, so an idle dict keeps its buffer until the next access (call `flush()` if 
+    it may stay idle for long).
+
+    With `thread_readers=True`, each thread reads by its own read-only connection 
+    (opened lazily), so reads run in parallel under WAL, while writes still go 
+    through the one shared connection.
+
+    With `ttl` (seconds, may be `inf`), each row has an `expire_at` timestamp (the 
+    column and its index are added to an existing table), expired rows are treated 
+    as missing, and `sweep()` deletes them in small batches. With `auto_vacuum=True`, 
+    `PRAGMA auto_vacuum = INCREMENTAL` is set (it takes effect on a new database, or 
+    after a `VACUUM`), and `sweep()` returns the freed pages to the file system.
+    """
 
     def __init__(
         self, 
@@ -40,8 +330,28 @@ class SqliteDict(MutableMapping):
         timeout: int | float = float("inf"), 
         uri: bool = False, 
         lock=None, 
+        write_behind: int = 0, 
+        flush_interval: float = inf, 
+        thread_readers: bool = False, 
+        ttl: None | float = None, 
+        auto_vacuum: bool = False, 
     ):
         self.dbfile = dbfile
+        self.lock = lock
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.auto_vacuum = auto_vacuum
+        # appended to the WHERE clauses, to exclude the expired rows
+        if ttl is None:
+            self._alive = self._where_alive = ""
+        else:
+            self._alive = f" AND (expire_at IS NULL OR expire_at > {_NOW})"
+            self._where_alive = f" WHERE (expire_at IS NULL OR expire_at > {_NOW})"
+        self._pending: dict = {}
+        self._pending_since = 0.0
+        # `in_transaction`: whether the thread is within `transaction()`
+        self._local = local()
         self.con = con = connect(
             dbfile, 
             autocommit=True, 
@@ -49,12 +359,18 @@ class SqliteDict(MutableMapping):
             timeout=timeout, 
             uri=uri, 
         )
+        if auto_vacuum:
+            con.execute("PRAGMA auto_vacuum = INCREMENTAL")
         con.executescript("""\
 PRAGMA journal_mode = wal;
 CREATE TABLE IF NOT EXISTS dict(
   key BLOB UNIQUE NOT NULL, 
   value BLOB NOT NULL
 );""")
+        if ttl is not None:
+            if not any(col[1] == "expire_at" for col in con.execute("PRAGMA table_info(dict)")):
+                con.execute("ALTER TABLE dict ADD COLUMN expire_at REAL")
+            con.execute("CREATE INDEX IF NOT EXISTS dict_expire_at ON dict(expire_at) WHERE expire_at IS NOT NULL")
         if key_dumps is None:
             key_dumps = dumps
         if key_loads is None:
@@ -63,24 +379,31 @@ CREATE TABLE IF NOT EXISTS dict(
             value_dumps = dumps
         if value_loads is None:
             value_loads = loads
+        self._key_dumps = key_dumps
+        self._value_dumps = value_dumps
+        self._value_loads = value_loads
         def execute(sql, params=None, /):
             if sql.startswith("SELECT"):
                 lock_ = None
+                if readers is not None and not self._in_transaction:
+                    cur = readers.get().cursor(AutoCloseCursor)
+                else:
+                    cur = con.cursor(AutoCloseCursor)
             else:
                 lock_ = lock
-            cur = con.cursor(AutoCloseCursor)
+                cur = con.cursor(AutoCloseCursor)
             if params:
                 if len(params) == 1:
                     if key_dumps:
                         key, = params
                         params = key_dumps(key),
                 elif key_dumps or value_dumps:
-                    key, value = params
+                    key, value, *rest = params
                     if key_dumps:
                         key = key_dumps(key)
                     if value_dumps:
                         value = value_dumps(value)
-                    params = key, value
+                    params = key, value, *rest
                 call_with_lock(lock_, cur.execute, sql, params)
             else:
                 call_with_lock(lock_, cur.execute, sql)
@@ -99,7 +422,7 @@ CREATE TABLE IF NOT EXISTS dict(
                     key = key_loads(key)
                 if len(r) == 3:
                     return key
-                value = r[2]
+                value = r[1]
                 if value_loads:
                     value = value_loads(value)
                 return key, value
@@ -109,51 +432,518 @@ CREATE TABLE IF NOT EXISTS dict(
                     return r[0]
                 return r
         con.row_factory = row_factory
+        readers = self._readers = None
+        if thread_readers:
+            readers = self._readers = _ReaderPool(dbfile, uri=uri, timeout=timeout, row_factory=row_factory)
 
     def __contains__(self, key, /) -> bool:
-        cur = self.execute("SELECT 1 FROM dict WHERE key = ? LIMIT 1", (key,))
+        if (value := self._buffered(key)) is not undefined:
+            return value is not _DELETED
+        cur = self.execute(f"SELECT 1 FROM dict WHERE key = ?{self._alive} LIMIT 1", (key,))
         return bool(next(cur, 0))
 
     def __del__(self, /):
-        self.con.close()
+        self.close()
 
     def __delitem__(self, key, /):
-        cur = self.execute("DELETE FROM dict WHERE key = ?", (key,))
+        if (kb := self._buffer_key(key)) is not undefined:
+            if key not in self:
+                raise KeyError(key)
+            self._buffer(kb, _DELETED)
+            return
+        cur = self.execute(f"DELETE FROM dict WHERE key = ?{self._alive}", (key,))
         if not cur.rowcount:
             raise KeyError(key)
 
+    def __enter__(self, /):
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
     def __getitem__(self, key, /):
-        cur = self.execute("SELECT value FROM dict WHERE key = ? LIMIT 1", (key,))
+        if (value := self._buffered(key)) is not undefined:
+            if value is _DELETED:
+                raise KeyError(key)
+            if value_loads := self._value_loads:
+                value = value_loads(value)
+            return value
+        cur = self.execute(f"SELECT value FROM dict WHERE key = ?{self._alive} LIMIT 1", (key,))
         for value in cur:
             return value
         raise KeyError(key)
 
     def __iter__(self, /) -> Iterator:
-        return self.execute("SELECT key, NULL, NULL FROM dict")
+        self.flush()
+        return self.execute(f"SELECT key, NULL, NULL FROM dict{self._where_alive}")
 
     def __len__(self, /) -> int:
-        return next(self.execute("SELECT COUNT(1) FROM dict"), 0)
+        self.flush()
+        return next(self.execute(f"SELECT COUNT(1) FROM dict{self._where_alive}"), 0)
 
     def __setitem__(self, key, value, /):
-        self.execute("REPLACE INTO dict (key, value) VALUES (?, ?)", (key, value))
+        self.set(key, value)
+
+    def _buffer_key(self, key, /):
+        "the key in the write buffer, or `undefined` if the write should not be buffered"
+        if self.write_behind <= 0 or self._in_transaction:
+            return undefined
+        if key_dumps := self._key_dumps:
+            key = key_dumps(key)
+        try:
+            hash(key)
+        except TypeError:
+            return undefined
+        return key
+
+    def _buffered(self, key, /):
+        "the buffered (serialized) value or `_DELETED`, or `undefined` if the key is not buffered"
+        if not self._pending:
+            return undefined
+        if monotonic() - self._pending_since >= self.flush_interval and not self._in_transaction:
+            self.flush()
+            return undefined
+        if key_dumps := self._key_dumps:
+            key = key_dumps(key)
+        try:
+            value = self._pending.get(key, undefined)
+        except TypeError:
+            return undefined
+        if self.ttl is not None and value is not undefined and value is not _DELETED:
+            # with ttl, a buffered write is a 2-tuple (value, expire_at)
+            value, expire_at = value
+            if expire_at is not None and expire_at <= time():
+                return _DELETED
+        return value
+
+    def _expire_at(self, ttl: None | float = None, /) -> None | float:
+        "the expiration timestamp of an item set now, with `ttl` (if None, `self.ttl`)"
+        if ttl is None:
+            ttl = self.ttl
+        if ttl is None or ttl == inf:
+            return None
+        return time() + ttl
+
+    def _encode_keys(self, keys: Iterable, /) -> dict:
+        "map each serialized key to the key"
+        if key_dumps := self._key_dumps:
+            return {key_dumps(k): k for k in keys}
+        return {k: k for k in keys}
+
+    def _reader(self, /) -> Connection:
+        if self._readers is None or self._in_transaction:
+            return self.con
+        return self._readers.get()
+
+    @property
+    def _in_transaction(self, /) -> bool:
+        "whether the current thread is within `transaction()`"
+        return getattr(self._local, "in_transaction", False)
+
+    @_in_transaction.setter
+    def _in_transaction(self, value: bool, /):
+        self._local.in_transaction = value
+
+    def _transact(self, func: Callable[[Connection], Any], /):
+        "call `func(con)` in one transaction (or in the current one, if within `transaction()` of any thread)"
+        con = self.con
+        if self._in_transaction:
+            return call_with_lock(self.lock, func, con)
+        def run():
+            if con.in_transaction:
+                return func(con)
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(con)
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+            return result
+        return call_with_lock(self.lock, run)
+
+    def _buffer(self, key, value, /):
+        pending = self._pending
+        if not pending:
+            self._pending_since = monotonic()
+        pending[key] = value
+        if len(pending) >= self.write_behind or monotonic() - self._pending_since >= self.flush_interval:
+            self.flush()
 
     def clear(self, /):
+        self._pending.clear()
         self.execute("DELETE FROM dict")
 
+    def close(self, /):
+        "flush the buffered writes, and then close the connections"
+        try:
+            self.flush()
+        finally:
+            self.con.close()
+            if self._readers is not None:
+                self._readers.close()
+
+    def flush(self, /):
+        "write all buffered writes (and deletions) in one transaction"
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = {}
+        to_delete = [(k,) for k, v in pending.items() if v is _DELETED]
+        if self.ttl is None:
+            to_replace = [(k, v) for k, v in pending.items() if v is not _DELETED]
+            sql = "REPLACE INTO dict (key, value) VALUES (?, ?)"
+        else:
+            to_replace = [(k, *v) for k, v in pending.items() if v is not _DELETED]
+            sql = "REPLACE INTO dict (key, value, expire_at) VALUES (?, ?, ?)"
+        def write(con):
+            if to_delete:
+                con.executemany("DELETE FROM dict WHERE key = ?", to_delete)
+            if to_replace:
+                con.executemany(sql, to_replace)
+        try:
+            self._transact(write)
+        except BaseException:
+            # keep the buffered writes, unless they have been superseded in the meantime
+            pending.update(self._pending)
+            self._pending = pending
+            raise
+
+    def get_many(self, keys: Iterable, /) -> tuple[dict, list]:
+        """look up many (hashable) keys, by one `SELECT ... WHERE key IN (...)` for every 
+        `MAX_KEYS_PER_STATEMENT` keys
+
+        :return: 2-tuple, the found items and the missing keys
+        """
+        found: dict = {}
+        missing: list = []
+        to_query: list = []
+        for k in keys:
+            if (value := self._buffered(k)) is undefined:
+                to_query.append(k)
+            elif value is _DELETED:
+                # deleted (or expired) in the write buffer
+                missing.append(k)
+            else:
+                found[k] = self._value_loads(value) if self._value_loads else value
+        encoded = self._encode_keys(to_query)
+        value_loads = self._value_loads
+        cur = self._reader().cursor()
+        cur.row_factory = None
+        params = list(encoded)
+        try:
+            for i in range(0, len(params), MAX_KEYS_PER_STATEMENT):
+                chunk = params[i:i+MAX_KEYS_PER_STATEMENT]
+                cur.execute(f"SELECT key, value FROM dict WHERE key IN ({",".join("?" * len(chunk))}){self._alive}", chunk)
+                for key, value in cur:
+                    found[encoded[key]] = value_loads(value) if value_loads else value
+        finally:
+            cur.close()
+        missing.extend(k for k in to_query if k not in found)
+        return found, missing
+
     def pop(self, key, /, default=undefined):
-        cur = self.execute("DELETE FROM dict WHERE key = ? RETURNING value", (key,))
+        self.flush()
+        cur = self.execute(f"DELETE FROM dict WHERE key = ?{self._alive} RETURNING value", (key,))
         if (value := next(cur, default)) is undefined:
             raise KeyError(key)
         return value
 
+    def pop_many(self, keys: Iterable, /) -> dict:
+        """remove many (hashable) keys in one transaction, missing keys are ignored
+
+        :return: the removed items
+        """
+        self.flush()
+        encoded = self._encode_keys(keys)
+        value_loads = self._value_loads
+        params = list(encoded)
+        alive = self._alive
+        def delete(con):
+            removed: dict = {}
+            cur = con.cursor()
+            cur.row_factory = None
+            try:
+                for i in range(0, len(params), MAX_KEYS_PER_STATEMENT):
+                    chunk = params[i:i+MAX_KEYS_PER_STATEMENT]
+                    cur.execute(f"DELETE FROM dict WHERE key IN ({",".join("?" * len(chunk))}){alive} RETURNING key, value", chunk)
+                    for key, value in cur.fetchall():
+                        removed[encoded[key]] = value_loads(value) if value_loads else value
+            finally:
+                cur.close()
+            return removed
+        if not params:
+            return {}
+        return self._transact(delete)
+
+    def update(self, other=(), /, **pairs):
+        "set many items by `executemany` in one transaction (or into the write buffer)"
+        items: Iterable
+        if isinstance(other, Mapping):
+            items = other.items()
+        elif hasattr(other, "keys"):
+            items = ((k, other[k]) for k in other.keys())
+        else:
+            items = other
+        if pairs:
+            items = chain(items, pairs.items())
+        if self.write_behind > 0 and not self._in_transaction:
+            for k, v in items:
+                self[k] = v
+            return
+        key_dumps, value_dumps = self._key_dumps, self._value_dumps
+        rows: list[tuple] = [(key_dumps(k) if key_dumps else k, value_dumps(v) if value_dumps else v) for k, v in items]
+        if not rows:
+            return
+        if self.ttl is None:
+            self._transact(lambda con: con.executemany("REPLACE INTO dict (key, value) VALUES (?, ?)", rows))
+        else:
+            expire_at = self._expire_at()
+            rows = [(k, v, expire_at) for k, v in rows]
+            self._transact(lambda con: con.executemany("REPLACE INTO dict (key, value, expire_at) VALUES (?, ?, ?)", rows))
+
+    def set(self, key, value, /, ttl: None | float = None):
+        "set the value, with a ttl (in seconds), if None, use `self.ttl`"
+        if self.ttl is None and ttl is not None:
+            raise ValueError("expiration is disabled, pass `ttl` to the constructor to enable it")
+        if (kb := self._buffer_key(key)) is not undefined:
+            if value_dumps := self._value_dumps:
+                value = value_dumps(value)
+            self._buffer(kb, value if self.ttl is None else (value, self._expire_at(ttl)))
+        elif self.ttl is None:
+            self.execute("REPLACE INTO dict (key, value) VALUES (?, ?)", (key, value))
+        else:
+            self.execute("REPLACE INTO dict (key, value, expire_at) VALUES (?, ?, ?)", (key, value, self._expire_at(ttl)))
+
+    def sweep(self, /, batch: int = 1000, limit: int = 0) -> int:
+        """delete the expired rows, at most `batch` rows per statement (each in a transaction 
+        of its own, unless within `transaction()`), so that the write lock is only held briefly
+
+        :param batch: the number of rows deleted by one statement
+        :param limit: at most so many rows are deleted, if <= 0, no limit
+
+        :return: the number of deleted rows
+        """
+        if self.ttl is None:
+            return 0
+        total = 0
+        while True:
+            n = batch if limit <= 0 else min(batch, limit - total)
+            if n <= 0:
+                break
+            cur = self.execute(f"""\
+DELETE FROM dict WHERE rowid IN (
+  SELECT rowid FROM dict WHERE expire_at <= {_NOW} LIMIT {n:d}
+)""")
+            total += cur.rowcount
+            if cur.rowcount < n:
+                break
+        if total and self.auto_vacuum:
+            # each step of this pragma frees some pages, so run it to the end
+            self.execute("PRAGMA incremental_vacuum").fetchall()
+        return total
+
+    @contextmanager
+    def transaction(self, /):
+        """a context manager, the writes in it are committed together on exit, or rolled back on error
+
+        .. code:: python
+
+            with d.transaction():
+                for k, v in items:
+                    d[k] = v
+
+        .. note::
+            The connection is shared, so the writes of other threads in the meantime also join the transaction, 
+            while their reads (with `thread_readers=True`) do not see its uncommitted writes.
+        """
+        if self._in_transaction:
+            yield self
+            return
+        self.flush()
+        con = self.con
+        def begin() -> bool:
+            if con.in_transaction:
+                return False
+            con.execute("BEGIN IMMEDIATE")
+            return True
+        if not call_with_lock(self.lock, begin):
+            # join the transaction, which another thread has opened on the shared connection
+            self._in_transaction = True
+            try:
+                yield self
+            finally:
+                self._in_transaction = False
+            return
+        self._in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            call_with_lock(self.lock, con.execute, "ROLLBACK")
+            raise
+        else:
+            call_with_lock(self.lock, con.execute, "COMMIT")
+        finally:
+            self._in_transaction = False
+
     def iter_values(self, /):
-        return self.execute("SELECT value FROM dict")
+        self.flush()
+        return self.execute(f"SELECT value FROM dict{self._where_alive}")
 
     def iter_items(self, /):
-        return self.execute("SELECT key, value FROM dict")
+        self.flush()
+        return self.execute(f"SELECT key, value FROM dict{self._where_alive}")
+
+
+class ShardedSqliteDict(MutableMapping):
+    """a dict-like which routes each key (by a stable hash) to one of several SqliteDict
+
+    Each shard is a database file of its own, so each has its own writer, and writes 
+    to different shards (from threads or processes) run in parallel. The files are 
+    `0.db`, `1.db`, ... in the directory `dbdir`, and the number of shards is recorded 
+    in their `user_version`, so they cannot be reopened with another number.
+
+    .. note::
+        Each shard guards its writes with a lock of its own, pass `thread_readers=True` 
+        (in `kwargs`) to let threads also read concurrently.
+
+    :param dbdir: the directory of the database files, it will be created if missing
+    :param shards: the number of shards
+    :param kwargs: the other arguments are passed to each `SqliteDict`
+    """
+
+    def __init__(
+        self, 
+        dbdir, 
+        /, 
+        shards: int = 8, 
+        **kwargs, 
+    ):
+        if shards <= 0:
+            raise ValueError(f"shards must be a positive integer, got {shards!r}")
+        makedirs(dbdir, exist_ok=True)
+        self.dbdir = dbdir
+        self.shards: tuple[SqliteDict, ...] = tuple(
+            SqliteDict(joinpath(dbdir, f"{i}.db"), lock=Lock(), **kwargs) for i in range(shards)
+        )
+        for shard in self.shards:
+            user_version = next(shard.execute("PRAGMA user_version"))
+            if not user_version:
+                shard.execute(f"PRAGMA user_version = {shards}")
+            elif user_version != shards:
+                self.close()
+                raise ValueError(f"{dbdir!r} has {user_version} shards, got shards={shards!r}")
+        self._key_dumps = self.shards[0]._key_dumps
+
+    def __contains__(self, key, /) -> bool:
+        return key in self._locate(key)
+
+    def __delitem__(self, key, /):
+        del self._locate(key)[key]
+
+    def __enter__(self, /):
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
+    def __getitem__(self, key, /):
+        return self._locate(key)[key]
+
+    def __iter__(self, /) -> Iterator:
+        return chain.from_iterable(self.shards)
+
+    def __len__(self, /) -> int:
+        return sum(map(len, self.shards))
+
+    def __setitem__(self, key, value, /):
+        self._locate(key)[key] = value
+
+    def _shard_index(self, key, /) -> int:
+        if key_dumps := self._key_dumps:
+            key = key_dumps(key)
+        return crc32(_stored_key_bytes(key)) % len(self.shards)
+
+    def _locate(self, key, /) -> SqliteDict:
+        return self.shards[self._shard_index(key)]
+
+    def _group(self, keys: Iterable, /) -> dict[int, list]:
+        groups: dict[int, list] = {}
+        for k in keys:
+            groups.setdefault(self._shard_index(k), []).append(k)
+        return groups
+
+    def clear(self, /):
+        for shard in self.shards:
+            shard.clear()
+
+    def close(self, /):
+        for shard in self.shards:
+            shard.close()
+
+    def flush(self, /):
+        for shard in self.shards:
+            shard.flush()
+
+    def get_many(self, keys: Iterable, /) -> tuple[dict, list]:
+        "look up many (hashable) keys, by one query (per chunk) for each shard"
+        found: dict = {}
+        missing: list = []
+        for i, group in self._group(keys).items():
+            found1, missing1 = self.shards[i].get_many(group)
+            found.update(found1)
+            missing.extend(missing1)
+        return found, missing
+
+    def pop_many(self, keys: Iterable, /) -> dict:
+        "remove many (hashable) keys, in one transaction for each shard"
+        removed: dict = {}
+        for i, group in self._group(keys).items():
+            removed.update(self.shards[i].pop_many(group))
+        return removed
+
+    def update(self, other=(), /, **pairs):
+        "set many items, in one transaction for each shard"
+        items: Iterable
+        if isinstance(other, Mapping):
+            items = other.items()
+        elif hasattr(other, "keys"):
+            items = ((k, other[k]) for k in other.keys())
+        else:
+            items = other
+        if pairs:
+            items = chain(items, pairs.items())
+        groups: dict[int, list] = {}
+        for k, v in items:
+            groups.setdefault(self._shard_index(k), []).append((k, v))
+        for i, group in groups.items():
+            self.shards[i].update(group)
+
+    def sweep(self, /, batch: int = 1000, limit: int = 0) -> int:
+        "delete the expired rows of each shard, see `SqliteDict.sweep()`"
+        total = 0
+        for shard in self.shards:
+            if limit > 0 and total >= limit:
+                break
+            total += shard.sweep(batch, limit - total if limit > 0 else 0)
+        return total
+
+    def iter_items(self, /) -> Iterator:
+        return chain.from_iterable(shard.iter_items() for shard in self.shards)
+
+    def iter_values(self, /) -> Iterator:
+        return chain.from_iterable(shard.iter_values() for shard in self.shards)
 
 
 class SqliteTableDict(MutableMapping):
+    """a dict-like view of the key and value columns of a table
+
+    With `thread_readers=True`, each thread reads by its own read-only connection 
+    (opened lazily), while writes go through `con`.
+
+    The point operations reuse a cursor per thread (and per connection), and the 
+    iterations stream rows by `fetchmany`, `arraysize` rows at a time.
+    """
 
     def __init__(
         self, 
@@ -163,10 +953,19 @@ class SqliteTableDict(MutableMapping):
         key: str | tuple[str, ...] = "id", 
         value: str | tuple[str, ...] = "data", 
         where: str = "", 
+        thread_readers: bool = False, 
+        arraysize: int = 1000, 
     ):
         if not isinstance(con, (Connection, Cursor)):
             con = connect(con, factory=AutoCloseConnection)
         self.con = con
+        self.arraysize = arraysize
+        self._local = local()
+        self._readers: None | _ReaderPool = None
+        if thread_readers:
+            connection = con.connection if isinstance(con, Cursor) else con
+            dbfile = next(f for _, name, f in connection.execute("PRAGMA database_list") if name == "main")
+            self._readers = _ReaderPool(dbfile, factory=AutoCloseConnection)
         table = enclose(table)
         key_is_tuple = self._key_is_tuple = isinstance(key, tuple)
         value_is_tuple = self._value_is_tuple = isinstance(value, tuple)
@@ -203,61 +1002,423 @@ class SqliteTableDict(MutableMapping):
         self._sql_iter_items = f"SELECT {key_str},{value_str} FROM {table}{where_str}"
 
     def __delitem__(self, key, /):
-        cur = execute(
-            self.con, 
-            self._sql_delitem, 
-            key, 
-            commit=True, 
-        )
-        cur.close()
-        if not cur.rowcount:
+        cur = self._cursor(self.con)
+        with _committing(cur):
+            cur.execute(self._sql_delitem, key if isinstance(key, tuple) else (key,))
+            deleted = cur.rowcount
+        if not deleted:
             raise KeyError(key)
 
     def __getitem__(self, key, /):
-        return find(
-            self.con, 
-            self._sql_getitem, 
-            key, 
-            default=KeyError(key), 
-            row_factory="any" if self._value_is_tuple else "one", 
-        )
+        cur = self._cursor(self.reader)
+        cur.execute(self._sql_getitem, key if isinstance(key, tuple) else (key,))
+        if (record := cur.fetchone()) is None:
+            raise KeyError(key)
+        return record if self._value_is_tuple else record[0]
 
     def __setitem__(self, key, val, /):
         if not isinstance(key, tuple):
             key = key,
         if not isinstance(val, tuple):
             val = val,
-        execute(self.con, self._sql_setitem, key + val, commit=True).close()
+        cur = self._cursor(self.con)
+        with _committing(cur):
+            cur.execute(self._sql_setitem, key + val)
 
     def __iter__(self, /) -> Iterator:
-        return query(
-            self.con, 
-            self._sql_iter, 
-            row_factory="any" if self._key_is_tuple else "one", 
-        )
+        if self._key_is_tuple:
+            return self._stream(self._sql_iter)
+        return self._stream(self._sql_iter, itemgetter(0))
 
     def __len__(self, /) -> int:
-        return find(self.con, self._sql_len)
+        cur = self._cursor(self.reader)
+        cur.execute(self._sql_len)
+        return cur.fetchone()[0]
+
+    def _cursor(self, con, /) -> Cursor:
+        "the cursor of `con` for the current thread, which is reused by the point operations"
+        if isinstance(con, Cursor):
+            return con
+        try:
+            cursors = self._local.cursors
+        except AttributeError:
+            cursors = self._local.cursors = {}
+        try:
+            return cursors[con]
+        except KeyError:
+            cur = cursors[con] = con.cursor()
+            return cur
+
+    def _stream(self, sql: str, row_factory: None | Callable = None, /) -> Iterator:
+        "execute `sql` by a new cursor, and yield the rows fetched by `fetchmany`"
+        reader = self.reader
+        cur = reader if isinstance(reader, Cursor) else reader.cursor()
+        try:
+            cur.arraysize = self.arraysize
+            cur.execute(sql)
+            fetchmany = cur.fetchmany
+            if row_factory is None:
+                while records := fetchmany():
+                    yield from records
+            else:
+                while records := fetchmany():
+                    yield from map(row_factory, records)
+        finally:
+            if cur is not reader:
+                cur.close()
+
+    @property
+    def reader(self, /) -> Connection | Cursor:
+        "the connection to read by, it is thread-local if `thread_readers` is enabled"
+        if self._readers is None:
+            return self.con
+        return self._readers.get()
 
     def clear(self, /):
         execute(self.con, self._sql_clear, commit=True)
 
+    def close(self, /):
+        "close the thread-local read-only connections (`con` is left open)"
+        self._local = local()
+        if self._readers is not None:
+            self._readers.close()
+
+    def update(self, other=(), /, **pairs):
+        "set many items by `executemany` in one transaction"
+        items: Iterable
+        if isinstance(other, Mapping):
+            items = other.items()
+        elif hasattr(other, "keys"):
+            items = ((k, other[k]) for k in other.keys())
+        else:
+            items = other
+        if pairs:
+            items = chain(items, pairs.items())
+        cur = self._cursor(self.con)
+        with _committing(cur):
+            cur.executemany(self._sql_setitem, (
+                (k if isinstance(k, tuple) else (k,)) + (v if isinstance(v, tuple) else (v,)) 
+                for k, v in items
+            ))
+
     def iter_values(self, /) -> Iterator:
-        return query(
-            self.con, 
-            self._sql_iter_values, 
-            row_factory="any" if self._value_is_tuple else "one", 
-        )
+        if self._value_is_tuple:
+            return self._stream(self._sql_iter_values)
+        return self._stream(self._sql_iter_values, itemgetter(0))
 
     def iter_items(self, /) -> Iterator:
         key_len, val_len = self._key_len, self._value_len
-        def row_factory(_, record):
+        if not (key_len or val_len):
+            # the records are already (key, value) pairs
+            return self._stream(self._sql_iter_items)
+        def row_factory(record, /):
             key = record[:key_len] if key_len else record[0]
             val = record[-val_len:] if val_len else record[-1]
             return key, val
-        return query(
-            self.con, 
-            self._sql_iter_items, 
-            row_factory=row_factory, 
+        return self._stream(self._sql_iter_items, row_factory)
+
+
+def _tuplify(o, /):
+    "convert (nested) lists into tuples, so that decoded JSON keys are hashable"
+    if isinstance(o, list):
+        return tuple(map(_tuplify, o))
+    return o
+
+
+class TieredDict(MutableMapping):
+    """a bounded in-memory cache (L1) in front of a SqliteDict (L2)
+
+    Writes go through to both tiers, so a restarted process finds a warm L2 (and 
+    nothing is lost when a worker dies before L1 evicts it). L2 hits are promoted 
+    into L1. Each value is stored with a wall-clock expiration timestamp, which is 
+    checked in both tiers, so TTLs survive restarts as well.
+
+    With `readonly=True`, the database is opened in read-only mode (it can be shared 
+    by several processes on one host), and writes only go to L1.
+    """
+
+    def __init__(
+        self, 
+        dbfile=":memory:", 
+        /, 
+        l1: None | MutableMapping = None, 
+        maxsize: int = 1024, 
+        ttl: float = inf, 
+        readonly: bool = False, 
+        key_dumps: None | Callable = dumps, 
+        key_loads: None | Callable = lambda b, /: _tuplify(loads(b)), 
+        value_dumps: None | Callable = dumps, 
+        value_loads: None | Callable = loads, 
+        timeout: int | float = float("inf"), 
+        uri: bool = False, 
+        lock=None, 
+    ):
+        if l1 is None:
+            l1 = LRUDict(maxsize)
+        self.l1 = l1
+        self.ttl = ttl
+        self.readonly = readonly
+        if readonly:
+            dbfile = _readonly_uri(dbfile, uri)
+            uri = True
+        self.l2 = SqliteDict(
+            dbfile, 
+            key_dumps=key_dumps, 
+            key_loads=key_loads, 
+            value_dumps=value_dumps, 
+            value_loads=value_loads, 
+            timeout=timeout, 
+            uri=uri, 
+            lock=lock, 
         )
 
+    __call__ = SizedDict.__call__
+
+    def __contains__(self, key, /) -> bool:
+        try:
+            self[key]
+            return True
+        except (KeyError, TypeError):
+            return False
+
+    def __delitem__(self, key, /):
+        found = self.l1.pop(key, None) is not None
+        if not self.readonly:
+            try:
+                del self.l2[key]
+                found = True
+            except KeyError:
+                pass
+        if not found:
+            raise KeyError(key)
+
+    def __getitem__(self, key, /):
+        l1 = self.l1
+        try:
+            expire_at, value = l1[key]
+        except KeyError:
+            pass
+        else:
+            if expire_at is None or expire_at > time():
+                return value
+            l1.pop(key, None)
+            raise KeyError(key)
+        expire_at, value = self.l2[key]
+        if expire_at is not None and expire_at <= time():
+            if not self.readonly:
+                self.l2.pop(key, None)
+            raise KeyError(key)
+        l1[key] = (expire_at, value)
+        return value
+
+    def __iter__(self, /) -> Iterator:
+        now = time()
+        l1 = self.l1
+        if self.readonly:
+            for key, (expire_at, _) in tuple(l1.items()):
+                if expire_at is None or expire_at > now:
+                    yield key
+        for key, (expire_at, _) in self.l2.iter_items():
+            if (expire_at is None or expire_at > now) and not (self.readonly and key in l1):
+                yield key
+
+    def __len__(self, /) -> int:
+        return sum(1 for _ in self)
+
+    def __setitem__(self, key, value, /):
+        self.set(key, value)
+
+    def clear(self, /):
+        self.l1.clear()
+        if not self.readonly:
+            self.l2.clear()
+
+    def set(self, key, value, /, ttl: None | float = None):
+        """set the value with a ttl (in seconds), if None, use `self.ttl`
+        """
+        if ttl is None:
+            ttl = self.ttl
+        expire_at = None if ttl == inf else time() + ttl
+        if not self.readonly:
+            self.l2[key] = [expire_at, value]
+        self.l1[key] = (expire_at, value)
+
+    def iter_items(self, /) -> Iterator:
+        for key in self:
+            try:
+                yield key, self[key]
+            except KeyError:
+                pass
+
+
+class _Request(NamedTuple):
+    func: Callable
+    args: tuple
+    future: Future
+    write: bool = False
+
+
+def _discard(d: MutableMapping, key, /) -> bool:
+    try:
+        del d[key]
+        return True
+    except KeyError:
+        return False
+
+
+def _resolve(future: Future, ok: bool, result, /):
+    if not future.done():
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+
+
+def _settle(future: Future, ok: bool, result, /):
+    "resolve `future` in its event loop (from another thread), unless it is done, or the loop is closed"
+    if future.done():
+        return
+    # the loop may have been closed in the meantime, e.g. the caller timed out under `asyncio.run()`
+    with suppress(RuntimeError):
+        future.get_loop().call_soon_threadsafe(_resolve, future, ok, result)
+
+
+class AsyncSqliteDict:
+    """an asyncio front-end of SqliteDict, which never blocks the event loop
+
+    All SQLite work runs on one dedicated thread, which takes requests from a queue. 
+    The writes, which are queued back to back, are coalesced into one transaction 
+    (each of them in its own savepoint, so a failed write does not affect the others).
+
+    .. code:: python
+
+        async with AsyncSqliteDict("cache.db") as d:
+            await d.set("key", {"a": 1})
+            value = await d.get("key")
+
+    :param dbfile: the database file
+    :param max_batch: at most how many queued requests to take at a time
+    :param kwargs: the other arguments are passed to `SqliteDict`
+    """
+
+    def __init__(
+        self, 
+        dbfile=":memory:", 
+        /, 
+        dumps: None | Callable = dumps, 
+        loads: None | Callable = loads, 
+        max_batch: int = 1024, 
+        **kwargs, 
+    ):
+        self.max_batch = max_batch
+        self.dict = SqliteDict(dbfile, dumps=dumps, loads=loads, **kwargs)
+        self._queue: SimpleQueue[_Request] = SimpleQueue()
+        self._closed = False
+        self._thread = Thread(target=self._run, name=f"{type(self).__name__}({dbfile!r})", daemon=True)
+        self._thread.start()
+
+    async def __aenter__(self, /):
+        return self
+
+    async def __aexit__(self, /, *exc_info):
+        await self.close()
+
+    def _run(self, /):
+        queue = self._queue
+        max_batch = self.max_batch
+        while True:
+            batch = [queue.get()]
+            with suppress(Empty):
+                while len(batch) < max_batch:
+                    batch.append(queue.get_nowait())
+            i = 0
+            while i < len(batch):
+                request = batch[i]
+                if not request.write:
+                    self._call(request)
+                    if request.func is self.dict.close:
+                        return
+                    i += 1
+                    continue
+                j = i + 1
+                while j < len(batch) and batch[j].write:
+                    j += 1
+                self._write(batch[i:j])
+                i = j
+
+    def _call(self, request: _Request, /):
+        try:
+            ok, result = True, request.func(*request.args)
+        except BaseException as e:
+            ok, result = False, e
+        _settle(request.future, ok, result)
+
+    def _write(self, requests: list[_Request], /):
+        con = self.dict.con
+        results: list[tuple[bool, Any]] = []
+        try:
+            with self.dict.transaction():
+                for request in requests:
+                    con.execute("SAVEPOINT write")
+                    try:
+                        result = request.func(*request.args)
+                    except BaseException as e:
+                        con.execute("ROLLBACK TO write")
+                        results.append((False, e))
+                    else:
+                        results.append((True, result))
+                    con.execute("RELEASE write")
+        except BaseException as e:
+            results = [(False, e)] * len(requests)
+        for request, (ok, result) in zip(requests, results):
+            _settle(request.future, ok, result)
+
+    def _submit(self, func: Callable, /, *args, write: bool = False) -> Future:
+        if self._closed:
+            raise RuntimeError(f"{self!r} is closed")
+        future = get_running_loop().create_future()
+        self._queue.put(_Request(func, args, future, write))
+        return future
+
+    async def close(self, /):
+        "close the database after all queued requests are done, and stop the thread"
+        if self._closed:
+            return
+        future = self._submit(self.dict.close)
+        self._closed = True
+        await future
+
+    async def contains(self, key, /) -> bool:
+        return await self._submit(self.dict.__contains__, key)
+
+    async def delete(self, key, /) -> bool:
+        "delete the key, return False if it did not exist"
+        return await self._submit(_discard, self.dict, key, write=True)
+
+    async def get(self, key, /, default=None):
+        return await self._submit(self.dict.get, key, default)
+
+    async def get_many(self, keys: Iterable, /) -> tuple[dict, list]:
+        "look up many (hashable) keys, return the found items and the missing keys"
+        return await self._submit(self.dict.get_many, tuple(keys))
+
+    async def len(self, /) -> int:
+        return await self._submit(self.dict.__len__)
+
+    async def pop_many(self, keys: Iterable, /) -> dict:
+        "remove many (hashable) keys, return the removed items"
+        return await self._submit(self.dict.pop_many, tuple(keys), write=True)
+
+    async def set(self, key, value, /, ttl: None | float = None):
+        await self._submit(self.dict.set, key, value, ttl, write=True)
+
+    async def sweep(self, /, batch: int = 1000, limit: int = 0) -> int:
+        "delete the expired rows, in batches (not within the transaction of coalesced writes)"
+        return await self._submit(self.dict.sweep, batch, limit)
+
+    async def update(self, other=(), /, **pairs):
+        if isinstance(other, Mapping):
+            other = dict(other)
+        elif not hasattr(other, "keys"):
+            other = tuple(other)
+        await self._submit(lambda: self.dict.update(other, **pairs), write=True)
@@ -4,33 +4,80 @@
 __author__ = "ChenyangGao <https://chenyanggao.github.io>"
 __version__ = (0, 1, 3)
 __all__ = [
-    "FetchType", "to_uri", "enclose", "connect", "context_cursor", 
-    "execute", "executescript", "query", "find", "upsert_items", 
-    "batch_execute", 
+    "PROFILES", "FetchType", "Pool", "to_uri", "enclose", "connect", 
+    "apply_profile", "context_cursor", 
+    "execute", "executescript", "query", "find", "query_columns", 
+    "upsert_items", "batch_execute", 
 ]
 
 from collections import ChainMap, UserDict
-from collections.abc import Buffer, Callable, Iterable, Mapping, Sequence
+from collections.abc import Buffer, Callable, Iterable, Iterator, Mapping, Sequence
 from contextlib import closing, contextmanager, suppress
 from enum import IntEnum
-from itertools import batched
+from itertools import batched, chain, islice
 from os import fsdecode, PathLike
 from os.path import isabs
 from platform import system
+from queue import Empty, Queue
 from re import compile as re_compile
-from sqlite3 import connect as sqlite_connect
-from time import perf_counter
+from sqlite3 import connect as sqlite_connect, Connection, Error as SqliteError
+from threading import local, Event, Lock, Thread
+from time import monotonic, perf_counter
 from typing import cast, Any, Final, Literal, Self
 from urllib.parse import urlencode
+from weakref import finalize, ref
 
 from sqlparse import format as sql_format, split as sql_split
 
+try:
+    import numpy as np
+except ImportError:
+    np = None # type: ignore
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None # type: ignore
+
 
 CRE_COLNAME_sub: Final = re_compile(r" \[[^]]+\]$").sub
 CRE_MULTI_SLASH_sub: Final = re_compile(r"/{2,}").sub
 TRANSTAB_PATH_TO_URI: Final = {c: f"%{c:02x}" for c in b"?#"}
 if system() == "Windows":
     TRANSTAB_PATH_TO_URI[ord("\\")] = "/"
+#: PRAGMA 预设，用于 `connect(profile=...)` 和 `Pool`
+#:
+#: - "bulk-load": 批量导入，不等待落盘（断电可能丢失数据甚至损坏数据库，但进程崩溃不会），检查点间隔大
+#: - "read-heavy": 读多写少，用 mmap 和较大的缓存
+#: - "durable": 每次提交都落盘
+PROFILES: Final[dict[str, dict[str, int | str]]] = {
+    "bulk-load": {
+        "journal_mode": "wal", 
+        "synchronous": "off", 
+        "mmap_size": 0, 
+        "cache_size": -262_144, 
+        "temp_store": "memory", 
+        "busy_timeout": 60_000, 
+        "wal_autocheckpoint": 10_000, 
+    }, 
+    "read-heavy": {
+        "journal_mode": "wal", 
+        "synchronous": "normal", 
+        "mmap_size": 1 << 30, 
+        "cache_size": -65_536, 
+        "temp_store": "memory", 
+        "busy_timeout": 5_000, 
+        "wal_autocheckpoint": 1_000, 
+    }, 
+    "durable": {
+        "journal_mode": "wal", 
+        "synchronous": "full", 
+        "mmap_size": 0, 
+        "cache_size": -2_000, 
+        "temp_store": "default", 
+        "busy_timeout": 30_000, 
+        "wal_autocheckpoint": 1_000, 
+    }, 
+}
 
 
 class MappingAsDict(UserDict, dict): # type: ignore
@@ -166,22 +213,151 @@ def enclose(
         return f"{encloser}{name.replace(encloser, encloser * 2)}{encloser}"
 
 
+def apply_profile(con, /, profile: str | Mapping[str, int | str]):
+    """对连接执行一组 PRAGMA
+
+    :param con: 数据库连接或游标
+    :param profile: `PROFILES` 中的名字，或者 PRAGMA 名字到值的映射
+
+    :return: 传入的连接或游标
+    """
+    pragmas = PROFILES[profile] if isinstance(profile, str) else profile
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ValueError(f"invalid pragma name: {name!r}")
+        con.execute(f"PRAGMA {name} = {value}").fetchall()
+    return con
+
+
 def connect(
     db = ":memory:", 
     /, 
     check_same_thread: bool = False, 
+    profile: None | str | Mapping[str, int | str] = None, 
     **connect_kwargs, 
 ):
     """返回连接对象
+
+    :param db: 数据库连接或游标或路径
+    :param check_same_thread: 是否只允许在创建连接的线程中使用
+    :param profile: PRAGMA 预设（见 `PROFILES`），或者 PRAGMA 名字到值的映射，会作用于返回的连接
+    :param connect_kwargs: 其它参数，传给 `sqlite3.connect`
+
+    :return: 连接对象
     """
     if isinstance(db, (bytes, str, PathLike)):
         connect_kwargs["check_same_thread"] = check_same_thread
         if isinstance(db, str) and db.startswith("file:"):
             connect_kwargs.setdefault("uri", db.startswith("file:"))
-        return sqlite_connect(db, **connect_kwargs)
-    if hasattr(db, "connection"):
-        return db.connection
-    return db
+        con = sqlite_connect(db, **connect_kwargs)
+    elif hasattr(db, "connection"):
+        con = db.connection
+    else:
+        con = db
+    if profile is not None:
+        apply_profile(con, profile)
+    return con
+
+
+class _ThreadToken:
+    "lives in a thread-local, so it is collected when its thread exits"
+    __slots__ = ("__weakref__",)
+
+
+def _discard_pooled(pool_ref: ref, con: Connection, /):
+    if (pool := pool_ref()) is None:
+        with suppress(SqliteError):
+            con.close()
+    else:
+        pool._discard(con)
+
+
+class Pool:
+    """连接池，每个线程（惰性地）打开并复用自己的连接，线程结束时，它的连接会被关闭
+
+    .. note::
+        每个连接都是单独打开的，所以 `Pool(":memory:")` 会让每个线程各有一个独立的内存数据库
+
+    :param db: 数据库路径
+    :param profile: PRAGMA 预设（见 `PROFILES`），或者 PRAGMA 名字到值的映射，会作用于每个新连接
+    :param check_interval: 如果一个连接闲置超过这么多秒，取出前先做健康检查（`SELECT 1`），失败则重新连接，如果 <= 0，则每次都检查
+    :param connect_kwargs: 其它参数，传给 `sqlite3.connect`
+    """
+
+    def __init__(
+        self, 
+        db, 
+        /, 
+        profile: None | str | Mapping[str, int | str] = None, 
+        check_interval: float = 60, 
+        **connect_kwargs, 
+    ):
+        self._local = local()
+        self._connections: list[Connection] = []
+        self._lock = Lock()
+        if isinstance(profile, str) and profile not in PROFILES:
+            raise ValueError(f"unknown profile: {profile!r}, expected one of {list(PROFILES)}")
+        self.db = db
+        self.profile = profile
+        self.check_interval = check_interval
+        self.connect_kwargs = connect_kwargs
+
+    def __del__(self, /):
+        self.close()
+
+    def __enter__(self, /) -> Self:
+        return self
+
+    def __exit__(self, /, *exc_info):
+        self.close()
+
+    def _open(self, /) -> Connection:
+        # check_same_thread=False only lets close() run in another thread
+        con = connect(self.db, check_same_thread=False, profile=self.profile, **self.connect_kwargs)
+        with self._lock:
+            self._connections.append(con)
+        return con
+
+    def _discard(self, con: Connection, /):
+        with self._lock:
+            with suppress(ValueError):
+                self._connections.remove(con)
+        with suppress(SqliteError):
+            con.close()
+
+    @staticmethod
+    def check(con: Connection, /) -> bool:
+        "健康检查：连接是否可用"
+        try:
+            con.execute("SELECT 1").fetchall()
+            return True
+        except SqliteError:
+            return False
+
+    def get(self, /) -> Connection:
+        "取出当前线程的连接，如果还没有或者健康检查失败，则打开一个新的"
+        local = self._local
+        con: None | Connection = getattr(local, "con", None)
+        now = monotonic()
+        if con is not None and now - local.last_used >= self.check_interval and not self.check(con):
+            self._discard(con)
+            con = None
+        if con is None:
+            con = local.con = self._open()
+            # close the connection, once the thread exits (and its thread-locals are collected)
+            token = local.token = _ThreadToken()
+            finalize(token, _discard_pooled, ref(self), con)
+        local.last_used = now
+        return con
+
+    def close(self, /):
+        "关闭所有连接"
+        with self._lock:
+            connections, self._connections = self._connections, []
+        self._local = local()
+        for con in connections:
+            with suppress(SqliteError):
+                con.close()
 
 
 @contextmanager
@@ -345,9 +521,149 @@ def find(
         return record
 
 
+def query_columns(
+    con, 
+    /, 
+    sql: str, 
+    params: Any = None, 
+    dtypes: None | Mapping[str, Any] | Sequence = None, 
+    arrow: None | bool = None, 
+    block_size: int = 65_536, 
+):
+    """执行一个 sql 查询语句，按列返回数据，每次用 `fetchmany` 取出 `block_size` 行，然后按列填入
+
+    - 如果使用 pyarrow，返回 `pyarrow.Table`，每个块成为一个 chunk
+    - 否则如果安装了 numpy，返回字典，值是 `numpy.ndarray`，预先分配，容量不足时倍增
+    - 否则返回字典，值是列表
+
+    :param con: 数据库连接或游标或路径
+    :param sql: sql 语句
+    :param params: 参数，用于填充 sql 中的占位符
+    :param dtypes: 各列的类型（字段名到类型的映射，或者按位置的序列），对于 numpy 是 dtype，对于 pyarrow 是 DataType 或其别名（例如 "int64"）。
+        未指定的列，类型由数据推断，numpy 数组在遇到不能安全转换的数据时会自动提升类型（例如遇到 NULL，或者整数和浮点数混合时，变成 object）。
+        pyarrow 没有 object 类型，所以值的类型混杂的列会变成字符串列（BLOB 按 UTF-8 解码），如果不能解码，则抛出 ValueError
+    :param arrow: 是否返回 `pyarrow.Table`，如果为 None，则在安装了 pyarrow 时返回
+    :param block_size: 每次 `fetchmany` 取出的行数
+
+    :return: 字段名到列的字典，或者 `pyarrow.Table`
+    """
+    if arrow is None:
+        arrow = pa is not None
+    elif arrow and pa is None:
+        raise ImportError("returning a pyarrow.Table requires pyarrow: pip install pyarrow")
+    with closing(execute(con, sql, params)) as cursor:
+        cursor.row_factory = None
+        fields: tuple[str, ...] = tuple(CRE_COLNAME_sub("", f[0]) for f in cursor.description)
+        ncols = len(fields)
+        types: list = [None] * ncols
+        if isinstance(dtypes, Mapping):
+            types = [dtypes.get(name) for name in fields]
+        elif dtypes:
+            types[:len(dtypes)] = dtypes
+        fetchmany = cursor.fetchmany
+        if arrow:
+            types = [pa.type_for_alias(t) if isinstance(t, str) else t for t in types]
+            chunks: list[list] = [[] for _ in range(ncols)]
+            # whether the column has fallen back to strings
+            as_string = [False] * ncols
+            while rows := fetchmany(block_size):
+                for i, col in enumerate(zip(*rows)):
+                    t = types[i]
+                    if as_string[i]:
+                        chunks[i].append(_arrow_strings(fields[i], col))
+                        continue
+                    try:
+                        chunks[i].append(pa.array(col, type=t))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                        if t is not None:
+                            raise ValueError(f"column {fields[i]!r} cannot be converted to {t}, check its type in `dtypes`") from e
+                        chunks[i] = _arrow_cast_strings(fields[i], chunks[i])
+                        chunks[i].append(_arrow_strings(fields[i], col))
+                        as_string[i] = True
+            columns: dict[str, Any] = {}
+            for name, chunk, t in zip(fields, chunks, types):
+                if t is None:
+                    # the chunks are typed by inference, which may differ, e.g. a chunk of all NULL
+                    found = {c.type for c in chunk}
+                    if len(found) == 1:
+                        t, = found
+                    elif found:
+                        try:
+                            t = pa.unify_schemas(
+                                [pa.schema([("_", t)]) for t in found], 
+                                promote_options="permissive", 
+                            ).field("_").type
+                            # a safe cast, e.g. it fails for an int64, which float64 cannot hold exactly
+                            chunk = [c.cast(t) for c in chunk]
+                        except (pa.ArrowInvalid, pa.ArrowTypeError):
+                            t = pa.string()
+                            chunk = _arrow_cast_strings(name, chunk)
+                    else:
+                        t = pa.null()
+                columns[name] = pa.chunked_array(chunk, type=t)
+            return pa.table(columns)
+        if np is None:
+            if any(t is not None for t in types):
+                raise ImportError("typed columns require numpy: pip install numpy")
+            lists: list[list] = [[] for _ in range(ncols)]
+            while rows := fetchmany(block_size):
+                for ls, col in zip(lists, zip(*rows)):
+                    ls.extend(col)
+            return dict(zip(fields, lists))
+        def resize(arr, capacity: int, n: int, /, dtype=None):
+            new_arr = np.empty(capacity, dtype=arr.dtype if dtype is None else dtype)
+            new_arr[:n] = arr[:n]
+            return new_arr
+        arrays: list = [np.empty(0, dtype=object if t is None else t) for t in types]
+        n = 0
+        while rows := fetchmany(block_size):
+            m = len(rows)
+            if n + m > len(arrays[0]):
+                capacity = max(2 * len(arrays[0]), n + m)
+                arrays = [resize(arr, capacity, n) for arr in arrays]
+            for i, col in enumerate(zip(*rows)):
+                arr = arrays[i]
+                if types[i] is None:
+                    block = np.asarray(col)
+                    # float64 cannot hold every int64 exactly, so a mix of both is kept as object
+                    if block.dtype.kind in "OSUV" or block.dtype.kind == "f" and any(type(v) is int for v in col):
+                        block = np.asarray(col, dtype=object)
+                    if not n:
+                        # the first block decides the initial type of the column
+                        arr = arrays[i] = np.empty(len(arr), dtype=block.dtype)
+                    elif {arr.dtype.kind, block.dtype.kind} in ({"f", "i"}, {"f", "u"}):
+                        arr = arrays[i] = resize(arr, len(arr), n, object)
+                    elif not np.can_cast(block.dtype, arr.dtype, "safe"):
+                        arr = arrays[i] = resize(arr, len(arr), n, np.result_type(arr.dtype, block.dtype))
+                    arr[n:n+m] = block
+                else:
+                    arr[n:n+m] = col
+            n += m
+        return {name: arr[:n] for name, arr in zip(fields, arrays)}
+
+
+def _arrow_strings(name: str, values: Iterable, /):
+    "a pyarrow string array of the values of mixed types, by `str()`, but BLOB is decoded as UTF-8"
+    try:
+        return pa.array(
+            [v if v is None else v.decode() if isinstance(v, Buffer) else str(v) for v in values], 
+            type=pa.string(), 
+        )
+    except UnicodeDecodeError as e:
+        raise ValueError(f"column {name!r} has values of mixed types, which pyarrow cannot hold, specify its type by `dtypes`, or pass `arrow=False`") from e
+
+
+def _arrow_cast_strings(name: str, chunks: list, /) -> list:
+    "cast the pyarrow arrays of a column to strings"
+    try:
+        return [c.cast(pa.string()) for c in chunks]
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ValueError(f"column {name!r} has values of mixed types, which pyarrow cannot hold, specify its type by `dtypes`, or pass `arrow=False`") from e
+
+
 def upsert_items(
     con, 
-    items: Mapping | Sequence[Mapping], 
+    items: Mapping | Iterable[Mapping] | Iterable[Sequence], 
     /, 
     extras: None | Mapping = None, 
     table: str = "data", 
@@ -356,6 +672,7 @@ def upsert_items(
     on_conflict_update_fields: Sequence[str] = (), 
     where: str = "", 
     commit: bool = False, 
+    chunk_size: int = 1_000, 
 ):
     """往表中插入或更新数据
 
@@ -365,32 +682,60 @@ def upsert_items(
         - https://sqlite.org/lang_conflict.html
 
     :param con: 数据库连接或游标或路径
-    :param items: 一组数据
+    :param items: 一组数据（可以是迭代器），每条数据是一个映射，或者一个按 ``fields`` 顺序排列的序列（例如元组，此时必须提供 ``fields``）
     :param extras: 附加数据（如果和原数据存在 key 冲突，则将其替换）
     :param table: 表名
-    :param fields: 需要插入的字段，如果有 extras，会将其字段合并进来
+    :param fields: 需要插入的字段，如果有 extras，会将其字段合并进来，如果为空，则取第 1 条数据的字段
     :param on_conflict: 冲突策略，如果为空，则会执行 UPSERT
     :param on_conflict_update_fields: 当发生冲突时，更新的字段（``on_conflict`` 为空时才生效）
     :param where: 判断条件，即在符合的情况下才执行 UPSERT，否则相当于 IGNORE
-    :param commit: 是否提交事务
+    :param commit: 是否提交事务（如果分块，则每块提交一次）
+    :param chunk_size: 每 ``chunk_size`` 条数据执行一次 ``executemany``（并且如果 ``commit`` 为 True，则提交一次），如果 <= 0，则所有数据在一次 ``executemany`` 中执行
 
-    :return: 游标
+    :return: 游标（如果分块，则是最后一块的游标），如果没有数据，则返回 None
     """
     if isinstance(items, Mapping):
         items = items,
-    if extras:
-        items = [ChainMap(item, extras) for item in items] # type: ignore
-        if fields:
-            fields = tuple(set(fields) | set(extras))
-    if not fields:
-        fields = tuple(items[0])
+    it = iter(items)
+    try:
+        first = next(it)
+    except StopIteration:
+        return None
+    it = chain((first,), it)
+    if not isinstance(first, Mapping):
+        if not fields:
+            raise ValueError("`fields` is required, when the items are sequences")
+        fields = tuple(fields)
+        if extras:
+            index = {field: i for i, field in enumerate(fields)}
+            replaces = [(index[k], v) for k, v in extras.items() if k in index]
+            appends = tuple(v for k, v in extras.items() if k not in index)
+            fields += tuple(k for k in extras if k not in index)
+            def merge(row: Sequence, /) -> tuple:
+                if replaces:
+                    row = list(row)
+                    for i, v in replaces:
+                        row[i] = v
+                return (*row, *appends)
+            it = map(merge, it)
+        placeholders = ",".join("?" * len(fields))
+    else:
+        if extras:
+            it = (ChainMap(item, extras) for item in it)
+            if fields:
+                fields = tuple(set(fields) | set(extras))
+            else:
+                fields = tuple(ChainMap(first, extras))
+        if not fields:
+            fields = tuple(first)
+        placeholders = ",".join(map(":".__add__, fields))
     if on_conflict:
         insert_conflict = " OR " + on_conflict
     else:
         insert_conflict = ""
     sql = f"""\
 INSERT{insert_conflict} INTO {enclose(table)}({",".join(map(enclose, fields))})
-VALUES ({",".join(map(":".__add__, fields))})"""
+VALUES ({placeholders})"""
     if not on_conflict:
         if not on_conflict_update_fields:
             on_conflict_update_fields = fields
@@ -398,7 +743,12 @@ VALUES ({",".join(map(":".__add__, fields))})"""
 ON CONFLICT DO UPDATE SET {",".join(map("{0}=excluded.{0}".format, map(enclose, on_conflict_update_fields)))}"""
     if where:
         sql += "\nWHERE " + where
-    return execute(con, sql, items, executemany=True, commit=commit)
+    if chunk_size <= 0:
+        return execute(con, sql, it, executemany=True, commit=commit)
+    cursor = None
+    for chunk in batched(it, chunk_size):
+        cursor = execute(con, sql, chunk, executemany=True, commit=commit)
+    return cursor
 
 
 def format_time(t: float, /) -> str:
@@ -414,21 +764,43 @@ def batch_execute(
     batch_size: int = 1_000, 
     init_sql: str = "", 
     show_progress: None | bool | Callable[[dict], Any] = None, 
+    pipeline: bool = False, 
+    target_latency: float = 0, 
+    max_batch_size: int = 1_000_000, 
 ) -> int:
     """批量执行 sql
 
     :param con: 数据库连接或游标或路径
     :param sql: 待执行的（DML） SQL
     :param data_it: 数据集
-    :param batch_size: 每批次大小
+    :param batch_size: 每批次大小（如果 `target_latency` > 0，则是初始大小）
     :param init_sql: 初始化 SQL
-    :param show_progress: 是否在命令行显示进度条，或者自定义函数（接受一个字典作为参数，格式为 {"elapsed": float, "affected": int}）
+    :param show_progress: 是否在命令行显示进度条，或者自定义函数（接受一个字典作为参数，格式为 
+        {"elapsed": float, "affected": int, "total": int, "rows": int, "rows_per_sec": float, "batch_size": int}，
+        其中 "affected" 是本批次的变更次数，"total" 是累计变更次数，"rows" 是累计执行的数据条数）
+    :param pipeline: 是否流水线执行，如果为 True，则由一个后台线程迭代 `data_it` 并准备下一批次，同时提交当前批次
+
+        .. note::
+            `data_it` 会在后台线程中被迭代，因此它不能依赖于当前线程的状态（例如 `check_same_thread=True` 的连接）
+
+    :param target_latency: 每批次提交的目标耗时（秒），如果 > 0，则根据上一批次的耗时调整批次大小（每次最多缩放 2 倍）
+    :param max_batch_size: 批次大小的上限
 
     :return: 行变更总次数
     """
     if isinstance(con, (bytes, str, PathLike)):
         with closing(connect(con)) as con:
-            return batch_execute(con, sql, data_it, batch_size)
+            return batch_execute(
+                con, 
+                sql, 
+                data_it, 
+                batch_size=batch_size, 
+                init_sql=init_sql, 
+                show_progress=show_progress, 
+                pipeline=pipeline, 
+                target_latency=target_latency, 
+                max_batch_size=max_batch_size, 
+            )
     if init_sql:
         executescript(con, init_sql)
     if isinstance(show_progress, bool):
@@ -437,7 +809,7 @@ def batch_execute(
                 try:
                     while True:
                         data = yield
-                        print(f"\r\x1b[K⏱️ {format_time(data["elapsed"])} 🧮 {data["affected"]}", end="", flush=True)
+                        print(f"\r\x1b[K⏱️ {format_time(data["elapsed"])} 🧮 {data["total"]} 🚀 {data["rows_per_sec"]:.0f} rows/s", end="", flush=True)
                 finally:
                     print(f"\r\x1b[K", end="", flush=True)
             gen = gen_progress()
@@ -445,14 +817,82 @@ def batch_execute(
             show_progress = cast(Callable, gen.send)
         else:
             show_progress = None
+    batch_size = max(1, min(batch_size, max_batch_size))
+    def read_batches(data_it: Iterable, /) -> Iterator[list]:
+        # `batch_size` is read anew for each batch, so the adjustments take effect
+        it = iter(data_it)
+        while batch := list(map(_normalize_params, islice(it, batch_size))):
+            yield batch
+    batches = read_batches(data_it)
+    if pipeline:
+        batches = _prefetch(batches)
     total = 0
+    rows = 0
     start_t = perf_counter()
     if show_progress is not None:
-        show_progress({"elapsed": perf_counter()-start_t, "affected": 0})
-    for batch in batched(data_it, batch_size):
-        cur = execute(con, sql, batch, executemany=True, commit=True)
-        total += cur.rowcount
-        if show_progress is not None:
-            show_progress({"elapsed": perf_counter()-start_t, "affected": cur.rowcount})
+        show_progress({"elapsed": 0.0, "affected": 0, "total": 0, "rows": 0, "rows_per_sec": 0.0, "batch_size": batch_size})
+    with closing(batches):
+        for batch in batches:
+            batch_start_t = perf_counter()
+            with context_cursor(con) as cur:
+                cur.executemany(sql, batch)
+                # read it before COMMIT, which resets it
+                affected = cur.rowcount
+            now = perf_counter()
+            total += affected
+            rows += len(batch)
+            if target_latency > 0:
+                cost = now - batch_start_t
+                scale = 2.0 if cost <= 0 else min(2.0, max(0.5, target_latency / cost))
+                batch_size = max(1, min(max_batch_size, int(len(batch) * scale)))
+            if show_progress is not None:
+                elapsed = now - start_t
+                show_progress({
+                    "elapsed": elapsed, 
+                    "affected": affected, 
+                    "total": total, 
+                    "rows": rows, 
+                    "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0, 
+                    "batch_size": batch_size, 
+                })
     return total
 
+
+def _prefetch[T](it: Iterator[T], /, size: int = 1) -> Iterator[T]:
+    """在后台线程中迭代 `it`，预先取出至多 `size` 个元素
+
+    :param it: 迭代器
+    :param size: 预取的元素个数
+
+    :return: 生成器，关闭它会让后台线程停止
+    """
+    queue: Queue = Queue(maxsize=size)
+    stopped = Event()
+    def produce():
+        try:
+            for item in it:
+                queue.put((True, item))
+                if stopped.is_set():
+                    return
+        except BaseException as e:
+            queue.put((False, e))
+        else:
+            queue.put((False, None))
+    thread = Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, item = queue.get()
+            if ok:
+                yield item
+            elif item is None:
+                break
+            else:
+                raise item
+    finally:
+        stopped.set()
+        # unblock the producer, which may be waiting for a free slot
+        with suppress(Empty):
+            while True:
+                queue.get_nowait()
+        thread.join()